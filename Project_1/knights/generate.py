@@ -0,0 +1,189 @@
+import itertools
+import random
+import sys
+import time
+import tracemalloc
+
+from logic import *
+
+ROLES = ["Knight", "Knave"]
+SPY = "Spy"
+
+# Backends stop being timed once the next puzzle would likely take longer
+TIME_LIMIT = 5
+
+
+def character_names(n):
+    """Returns names for n characters: A through Z, then P26, P27, ..."""
+    return [chr(ord("A") + i) if i < 26 else f"P{i}" for i in range(n)]
+
+
+def role_symbol(name, role):
+    """Returns the symbol for a character having a role, like puzzle.py."""
+    return Symbol(f"{name} is a {role}")
+
+
+def random_statement(rng, names, roles):
+    """Returns a random claim about the roles of one or two characters."""
+    x, y = rng.choice(names), rng.choice(names)
+    r, s = rng.choice(roles), rng.choice(roles)
+    kind = rng.randrange(5)
+    if kind == 0:
+        return role_symbol(x, r)
+    if kind == 1:
+        return Not(role_symbol(x, r))
+    if kind == 2:
+        # "X and Y are the same kind"
+        return Or(*[And(role_symbol(x, role), role_symbol(y, role))
+                    for role in roles])
+    if kind == 3:
+        return Or(role_symbol(x, r), role_symbol(y, s))
+    return And(role_symbol(x, r), role_symbol(y, s))
+
+
+def generate_puzzle(n, spy=False, seed=None, max_statements=None):
+    """
+    Generates a random knights and knaves puzzle with n characters.
+
+    Knights only say true things and knaves only false things. If spy is
+    set, exactly one character is a spy, who may say either. Statements are
+    added until the knowledge base determines every character's role.
+
+    Returns a tuple (knowledge, queries, solution): the knowledge base, the
+    list of every role symbol, and the set of role symbols that are true.
+    """
+    rng = random.Random(seed)
+    names = character_names(n)
+    roles = ROLES + [SPY] if spy else ROLES
+    if max_statements is None:
+        max_statements = 50 * n
+
+    # Choose the hidden solution
+    assignment = {name: rng.choice(ROLES) for name in names}
+    if spy:
+        assignment[rng.choice(names)] = SPY
+    model = {
+        role_symbol(name, role).name: assignment[name] == role
+        for name in names for role in roles
+    }
+    queries = [role_symbol(name, role) for name in names for role in roles]
+    solution = {role_symbol(name, assignment[name]) for name in names}
+
+    # Each character has exactly one role
+    knowledge = []
+    for name in names:
+        knowledge.append(Or(*[role_symbol(name, role) for role in roles]))
+        for first, second in itertools.combinations(roles, 2):
+            knowledge.append(Not(And(role_symbol(name, first),
+                                     role_symbol(name, second))))
+
+    # There is exactly one spy
+    if spy:
+        knowledge.append(Or(*[role_symbol(name, SPY) for name in names]))
+        for first, second in itertools.combinations(names, 2):
+            knowledge.append(Not(And(role_symbol(first, SPY),
+                                     role_symbol(second, SPY))))
+
+    # Check for a unique solution incrementally as statements are added
+    base = KnowledgeBase(*knowledge)
+    statements = 0
+    while True:
+        if all(base.ask(symbol) for symbol in solution):
+            return And(*knowledge), queries, solution
+        if statements >= max_statements:
+            raise Exception(f"no unique solution after {statements} statements")
+
+        # Every character makes one more statement that fits their role
+        for speaker in names:
+            statement = random_statement(rng, names, roles)
+            truth = statement.evaluate(model)
+            while assignment[speaker] != SPY and \
+                    truth != (assignment[speaker] == "Knight"):
+                statement = random_statement(rng, names, roles)
+                truth = statement.evaluate(model)
+            claims = [
+                Implication(role_symbol(speaker, "Knight"), statement),
+                Implication(role_symbol(speaker, "Knave"), Not(statement)),
+            ]
+            for claim in claims:
+                knowledge.append(claim)
+                base.tell(claim)
+            statements += 1
+
+
+def solve_enumeration(knowledge, queries):
+    """Solves a puzzle with one model enumeration per query."""
+    knowledge = simplify(knowledge)
+    return {query for query in queries if enumeration_check(
+        knowledge, query, knowledge.symbols() | query.symbols())}
+
+
+def solve_truth_table(knowledge, queries):
+    """Solves a puzzle with one bit-parallel truth table per query."""
+    knowledge = simplify(knowledge)
+    return {query for query in queries if truth_table_check(
+        knowledge, query, knowledge.symbols() | query.symbols())}
+
+
+def solve_batch(knowledge, queries):
+    """Solves a puzzle with a single pass over the models of knowledge."""
+    entailed, _ = model_check_all(knowledge, queries)
+    return entailed
+
+
+def solve_sat(knowledge, queries):
+    """Solves a puzzle with the incremental SAT knowledge base."""
+    entailed, _ = KnowledgeBase(knowledge).ask_all(queries)
+    return entailed
+
+
+# Each backend, and the most symbols it is worth timing on, if limited
+BACKENDS = {
+    "enumeration": (solve_enumeration, None),
+    "truth table": (solve_truth_table, None),
+    "batch": (solve_batch, TRUTH_TABLE_LIMIT),
+    "sat": (solve_sat, None),
+}
+
+
+def main():
+    if len(sys.argv) > 4:
+        sys.exit("Usage: python generate.py [max_characters] [spy] [seed]")
+    max_n = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    spy = len(sys.argv) > 2 and sys.argv[2] == "spy"
+    seed = int(sys.argv[3]) if len(sys.argv) > 3 else 0
+
+    print(f"{'N':>3} {'symbols':>8} {'conjuncts':>10}  "
+          f"{'backend':<12} {'time (s)':>10} {'peak (KiB)':>11}")
+    skipped = set()
+    for n in range(1, max_n + 1):
+        knowledge, queries, solution = generate_puzzle(n, spy=spy, seed=seed)
+        for backend, (solve, max_symbols) in BACKENDS.items():
+            if backend in skipped:
+                continue
+            if max_symbols is not None and len(queries) > max_symbols:
+                skipped.add(backend)
+                continue
+
+            start = time.perf_counter()
+            entailed = solve(knowledge, queries)
+            elapsed = time.perf_counter() - start
+            if entailed != solution:
+                raise Exception(f"{backend} solved N={n} incorrectly")
+
+            # Measure memory in a separate run, since tracing slows it down
+            tracemalloc.start()
+            solve(knowledge, queries)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            print(f"{n:>3} {len(queries):>8} {len(knowledge.conjuncts):>10}  "
+                  f"{backend:<12} {elapsed:>10.4f} {peak / 1024:>11.1f}")
+
+            # Each extra character multiplies the number of models
+            if elapsed * 2 ** (len(queries) // n) > TIME_LIMIT:
+                skipped.add(backend)
+
+
+if __name__ == "__main__":
+    main()
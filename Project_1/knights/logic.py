@@ -1,12 +1,60 @@
 import itertools
+import weakref
 
+from sat import Solver
 
-class Sentence():
+
+# Every live sentence, keyed by its class and constructor arguments
+_sentences = weakref.WeakValueDictionary()
+
+
+class Interned(type):
+    """
+    Metaclass that hash-conses sentences: constructing a sentence that is
+    structurally equal to a live one returns the existing object, so equal
+    sentences are identical and share their subformulas.
+    """
+
+    def __call__(cls, *args, **kwargs):
+        sentence = super().__call__(*args, **kwargs)
+        key = (cls, sentence.arguments())
+        existing = _sentences.get(key)
+        if existing is not None:
+            return existing
+
+        # Freeze the new sentence by caching its hash
+        object.__setattr__(sentence, "_hash", hash(key))
+        _sentences[key] = sentence
+        return sentence
+
+
+class Sentence(metaclass=Interned):
+
+    __slots__ = ("_hash", "_symbols", "__weakref__")
+
+    def __setattr__(self, name, value):
+        if hasattr(self, "_hash"):
+            raise AttributeError("logical sentences are immutable")
+        object.__setattr__(self, name, value)
+
+    def __hash__(self):
+        return self._hash
+
+    def __reduce__(self):
+        return (type(self), self.arguments())
+
+    def arguments(self):
+        """Returns the tuple of arguments the sentence was constructed with."""
+        return ()
 
     def evaluate(self, model):
         """Evaluates the logical sentence."""
         raise Exception("nothing to evaluate")
 
+    def evaluate_bits(self, columns, ones):
+        """Evaluates the logical sentence over many models at once."""
+        raise Exception("nothing to evaluate")
+
     def formula(self):
         """Returns string formula representing logical sentence."""
         return ""
@@ -15,6 +63,15 @@ class Sentence():
         """Returns a set of all symbols in the logical sentence."""
         return set()
 
+    def cached_symbols(self, compute):
+        """Returns a copy of the symbols, computing them once per sentence."""
+        try:
+            return set(self._symbols)
+        except AttributeError:
+            symbols = frozenset(compute())
+            object.__setattr__(self, "_symbols", symbols)
+            return set(symbols)
+
     @classmethod
     def validate(cls, sentence):
         if not isinstance(sentence, Sentence):
@@ -34,7 +91,7 @@ class Sentence():
                         return False
                     count -= 1
             return count == 0
-        if not len(s) or s.isalpha() or (
+        if not len(s) or s.isalpha() or s in ("⊤", "⊥") or (
             s[0] == "(" and s[-1] == ")" and balanced(s[1:-1])
         ):
             return s
@@ -44,14 +101,13 @@ class Sentence():
 
 class Symbol(Sentence):
 
+    __slots__ = ("name",)
+
     def __init__(self, name):
         self.name = name
 
-    def __eq__(self, other):
-        return isinstance(other, Symbol) and self.name == other.name
-
-    def __hash__(self):
-        return hash(("symbol", self.name))
+    def arguments(self):
+        return (self.name,)
 
     def __repr__(self):
         return self.name
@@ -62,6 +118,12 @@ class Symbol(Sentence):
         except KeyError:
             raise Exception(f"variable {self.name} not in model")
 
+    def evaluate_bits(self, columns, ones):
+        try:
+            return columns[self.name]
+        except KeyError:
+            raise Exception(f"variable {self.name} not in model")
+
     def formula(self):
         return self.name
 
@@ -70,15 +132,15 @@ class Symbol(Sentence):
 
 
 class Not(Sentence):
+
+    __slots__ = ("operand",)
+
     def __init__(self, operand):
         Sentence.validate(operand)
         self.operand = operand
 
-    def __eq__(self, other):
-        return isinstance(other, Not) and self.operand == other.operand
-
-    def __hash__(self):
-        return hash(("not", hash(self.operand)))
+    def arguments(self):
+        return (self.operand,)
 
     def __repr__(self):
         return f"Not({self.operand})"
@@ -86,26 +148,27 @@ class Not(Sentence):
     def evaluate(self, model):
         return not self.operand.evaluate(model)
 
+    def evaluate_bits(self, columns, ones):
+        return ones ^ self.operand.evaluate_bits(columns, ones)
+
     def formula(self):
         return "¬" + Sentence.parenthesize(self.operand.formula())
 
     def symbols(self):
-        return self.operand.symbols()
+        return self.cached_symbols(self.operand.symbols)
 
 
 class And(Sentence):
+
+    __slots__ = ("conjuncts",)
+
     def __init__(self, *conjuncts):
         for conjunct in conjuncts:
             Sentence.validate(conjunct)
-        self.conjuncts = list(conjuncts)
+        self.conjuncts = conjuncts
 
-    def __eq__(self, other):
-        return isinstance(other, And) and self.conjuncts == other.conjuncts
-
-    def __hash__(self):
-        return hash(
-            ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
-        )
+    def arguments(self):
+        return self.conjuncts
 
     def __repr__(self):
         conjunctions = ", ".join(
@@ -114,35 +177,44 @@ class And(Sentence):
         return f"And({conjunctions})"
 
     def add(self, conjunct):
-        Sentence.validate(conjunct)
-        self.conjuncts.append(conjunct)
+        raise TypeError("logical sentences are immutable; "
+                        "use And(*knowledge.conjuncts, conjunct) instead")
 
     def evaluate(self, model):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
 
+    def evaluate_bits(self, columns, ones):
+        bits = ones
+        for conjunct in self.conjuncts:
+            bits &= conjunct.evaluate_bits(columns, ones)
+            if not bits:
+                break
+        return bits
+
     def formula(self):
+        if not self.conjuncts:
+            return "⊤"
         if len(self.conjuncts) == 1:
             return self.conjuncts[0].formula()
         return " ∧ ".join([Sentence.parenthesize(conjunct.formula())
                            for conjunct in self.conjuncts])
 
     def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
+        return self.cached_symbols(lambda: set().union(
+            *[conjunct.symbols() for conjunct in self.conjuncts]))
 
 
 class Or(Sentence):
+
+    __slots__ = ("disjuncts",)
+
     def __init__(self, *disjuncts):
         for disjunct in disjuncts:
             Sentence.validate(disjunct)
-        self.disjuncts = list(disjuncts)
-
-    def __eq__(self, other):
-        return isinstance(other, Or) and self.disjuncts == other.disjuncts
+        self.disjuncts = disjuncts
 
-    def __hash__(self):
-        return hash(
-            ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
-        )
+    def arguments(self):
+        return self.disjuncts
 
     def __repr__(self):
         disjuncts = ", ".join([str(disjunct) for disjunct in self.disjuncts])
@@ -151,30 +223,39 @@ class Or(Sentence):
     def evaluate(self, model):
         return any(disjunct.evaluate(model) for disjunct in self.disjuncts)
 
+    def evaluate_bits(self, columns, ones):
+        bits = 0
+        for disjunct in self.disjuncts:
+            bits |= disjunct.evaluate_bits(columns, ones)
+            if bits == ones:
+                break
+        return bits
+
     def formula(self):
+        if not self.disjuncts:
+            return "⊥"
         if len(self.disjuncts) == 1:
             return self.disjuncts[0].formula()
         return " ∨  ".join([Sentence.parenthesize(disjunct.formula())
                             for disjunct in self.disjuncts])
 
     def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
+        return self.cached_symbols(lambda: set().union(
+            *[disjunct.symbols() for disjunct in self.disjuncts]))
 
 
 class Implication(Sentence):
+
+    __slots__ = ("antecedent", "consequent")
+
     def __init__(self, antecedent, consequent):
         Sentence.validate(antecedent)
         Sentence.validate(consequent)
         self.antecedent = antecedent
         self.consequent = consequent
 
-    def __eq__(self, other):
-        return (isinstance(other, Implication)
-                and self.antecedent == other.antecedent
-                and self.consequent == other.consequent)
-
-    def __hash__(self):
-        return hash(("implies", hash(self.antecedent), hash(self.consequent)))
+    def arguments(self):
+        return (self.antecedent, self.consequent)
 
     def __repr__(self):
         return f"Implication({self.antecedent}, {self.consequent})"
@@ -183,29 +264,32 @@ class Implication(Sentence):
         return ((not self.antecedent.evaluate(model))
                 or self.consequent.evaluate(model))
 
+    def evaluate_bits(self, columns, ones):
+        return ((ones ^ self.antecedent.evaluate_bits(columns, ones))
+                | self.consequent.evaluate_bits(columns, ones))
+
     def formula(self):
         antecedent = Sentence.parenthesize(self.antecedent.formula())
         consequent = Sentence.parenthesize(self.consequent.formula())
         return f"{antecedent} => {consequent}"
 
     def symbols(self):
-        return set.union(self.antecedent.symbols(), self.consequent.symbols())
+        return self.cached_symbols(lambda: set.union(
+            self.antecedent.symbols(), self.consequent.symbols()))
 
 
 class Biconditional(Sentence):
+
+    __slots__ = ("left", "right")
+
     def __init__(self, left, right):
         Sentence.validate(left)
         Sentence.validate(right)
         self.left = left
         self.right = right
 
-    def __eq__(self, other):
-        return (isinstance(other, Biconditional)
-                and self.left == other.left
-                and self.right == other.right)
-
-    def __hash__(self):
-        return hash(("biconditional", hash(self.left), hash(self.right)))
+    def arguments(self):
+        return (self.left, self.right)
 
     def __repr__(self):
         return f"Biconditional({self.left}, {self.right})"
@@ -216,17 +300,297 @@ class Biconditional(Sentence):
                 or (not self.left.evaluate(model)
                     and not self.right.evaluate(model)))
 
+    def evaluate_bits(self, columns, ones):
+        return ones ^ (self.left.evaluate_bits(columns, ones)
+                       ^ self.right.evaluate_bits(columns, ones))
+
     def formula(self):
-        left = Sentence.parenthesize(str(self.left))
-        right = Sentence.parenthesize(str(self.right))
+        left = Sentence.parenthesize(self.left.formula())
+        right = Sentence.parenthesize(self.right.formula())
         return f"{left} <=> {right}"
 
     def symbols(self):
-        return set.union(self.left.symbols(), self.right.symbols())
+        return self.cached_symbols(lambda: set.union(
+            self.left.symbols(), self.right.symbols()))
+
+
+# The empty conjunction is always true and the empty disjunction always
+# false, written as ⊤ and ⊥ in formulas
+TRUE = And()
+FALSE = Or()
+
+
+def simplify(sentence, verify=False):
+    """
+    Rewrites a sentence into a smaller equivalent one.
+
+    Flattens nested conjunctions and disjunctions, removes duplicate and
+    complementary operands, removes double negations, and folds the constants
+    TRUE and FALSE through every connective. If verify is set, checks that the
+    result is equivalent to the input.
+    """
+    memo = dict()
+
+    def junction(cls, operands, identity, absorbing):
+        """Builds a flattened, deduplicated And or Or from simplified operands."""
+        flattened = dict()
+        for operand in operands:
+            for item in (operand.arguments() if type(operand) is cls
+                         else (operand,)):
+                if item is absorbing:
+                    return absorbing
+                if item is not identity:
+                    flattened[item] = None
+
+        # An operand alongside its negation decides the whole junction
+        for item in flattened:
+            if isinstance(item, Not) and item.operand in flattened:
+                return absorbing
+
+        if len(flattened) == 1:
+            return next(iter(flattened))
+        return cls(*flattened)
+
+    def negate(sentence):
+        """Returns the simplified negation of a simplified sentence."""
+        if sentence is TRUE:
+            return FALSE
+        if sentence is FALSE:
+            return TRUE
+        if isinstance(sentence, Not):
+            return sentence.operand
+        return Not(sentence)
+
+    def rewrite(sentence):
+        if sentence in memo:
+            return memo[sentence]
+
+        if isinstance(sentence, Symbol):
+            result = sentence
+        elif isinstance(sentence, Not):
+            result = negate(rewrite(sentence.operand))
+        elif isinstance(sentence, And):
+            result = junction(And, map(rewrite, sentence.conjuncts),
+                              TRUE, FALSE)
+        elif isinstance(sentence, Or):
+            result = junction(Or, map(rewrite, sentence.disjuncts),
+                              FALSE, TRUE)
+        elif isinstance(sentence, Implication):
+            antecedent = rewrite(sentence.antecedent)
+            consequent = rewrite(sentence.consequent)
+            if antecedent is FALSE or consequent is TRUE or \
+                    antecedent is consequent:
+                result = TRUE
+            elif antecedent is TRUE:
+                result = consequent
+            elif consequent is FALSE:
+                result = negate(antecedent)
+            else:
+                result = Implication(antecedent, consequent)
+        elif isinstance(sentence, Biconditional):
+            left = rewrite(sentence.left)
+            right = rewrite(sentence.right)
+            if left is right:
+                result = TRUE
+            elif left is TRUE:
+                result = right
+            elif right is TRUE:
+                result = left
+            elif left is FALSE:
+                result = negate(right)
+            elif right is FALSE:
+                result = negate(left)
+            else:
+                result = Biconditional(left, right)
+        else:
+            raise TypeError("must be a logical sentence")
+
+        memo[sentence] = result
+        return result
+
+    result = rewrite(sentence)
+    if verify and not equivalent(sentence, result):
+        raise Exception(f"simplified {result} is not equivalent to {sentence}")
+    return result
+
+
+def to_nnf(sentence, verify=False):
+    """
+    Rewrites a sentence into negation normal form: only And, Or and Not,
+    with every Not applied directly to a symbol. The result is simplified.
+    """
+    memo = dict()
+
+    def rewrite(sentence, negated):
+        key = (sentence, negated)
+        if key in memo:
+            return memo[key]
+
+        if isinstance(sentence, Symbol):
+            result = Not(sentence) if negated else sentence
+        elif isinstance(sentence, Not):
+            result = rewrite(sentence.operand, not negated)
+        elif isinstance(sentence, (And, Or)):
+            # De Morgan's laws swap the connective under negation
+            cls = type(sentence)
+            if negated:
+                cls = Or if cls is And else And
+            result = cls(*[rewrite(operand, negated)
+                           for operand in sentence.arguments()])
+        elif isinstance(sentence, Implication):
+            # a => c is ¬a ∨ c
+            result = rewrite(Or(Not(sentence.antecedent), sentence.consequent),
+                             negated)
+        elif isinstance(sentence, Biconditional):
+            # l <=> r is (l ∧ r) ∨ (¬l ∧ ¬r), and its negation swaps one side
+            left, right = sentence.left, sentence.right
+            if negated:
+                right = Not(right)
+            result = Or(And(rewrite(left, False), rewrite(right, False)),
+                        And(rewrite(left, True), rewrite(right, True)))
+        else:
+            raise TypeError("must be a logical sentence")
+
+        memo[key] = result
+        return result
+
+    result = simplify(rewrite(sentence, False))
+    if verify and not equivalent(sentence, result):
+        raise Exception(f"normal form {result} is not equivalent to {sentence}")
+    return result
+
+
+def equivalent(first, second):
+    """Checks if two sentences are true in exactly the same models."""
+    return model_check(TRUE, Biconditional(first, second), simplify_first=False)
+
+
+def to_literal(sentence, variables, clauses):
+    """
+    Returns an integer literal that is true exactly when the sentence is.
+
+    variables maps symbol names to variable numbers and is extended as new
+    symbols are seen. Compound subformulas get an auxiliary variable (the
+    Tseitin encoding), keyed in variables by the subformula itself, whose
+    defining clauses are appended to clauses. Subformulas already in
+    variables are not encoded again.
+    """
+
+    def variable(key):
+        if key not in variables:
+            variables[key] = len(variables) + 1
+        return variables[key]
+
+    def literal(sentence):
+        if isinstance(sentence, Symbol):
+            return variable(sentence.name)
+        if isinstance(sentence, Not):
+            return -literal(sentence.operand)
+
+        # Compound subformulas are shared, so each one is encoded only once
+        if sentence in variables:
+            return variables[sentence]
+        operands = [literal(operand) for operand in sentence.arguments()]
+        x = variable(sentence)
+        if isinstance(sentence, And):
+            clauses.extend([-x, operand] for operand in operands)
+            clauses.append([x] + [-operand for operand in operands])
+        elif isinstance(sentence, Or):
+            clauses.append([-x] + operands)
+            clauses.extend([x, -operand] for operand in operands)
+        elif isinstance(sentence, Implication):
+            a, c = operands
+            clauses.extend([[-x, -a, c], [x, a], [x, -c]])
+        elif isinstance(sentence, Biconditional):
+            left, right = operands
+            clauses.extend([[-x, -left, right], [-x, left, -right],
+                            [x, left, right], [x, -left, -right]])
+        else:
+            raise TypeError("must be a logical sentence")
+        return x
+
+    return literal(sentence)
+
+
+def to_clauses(sentence, variables):
+    """
+    Encodes a sentence as a list of clauses in conjunctive normal form.
+
+    Each clause is a list of nonzero integers, where n stands for variable n
+    and -n for its negation, numbered as in to_literal. Subformulas that are
+    not already clauses get an auxiliary variable, so the clauses are
+    satisfiable exactly when the sentence is and entail the same facts
+    about its symbols.
+    """
+    clauses = []
+
+    def is_literal(sentence):
+        return isinstance(sentence, Symbol) or (
+            isinstance(sentence, Not) and isinstance(sentence.operand, Symbol))
+
+    # Top-level conjuncts that are already clauses are emitted directly
+    conjuncts = (sentence.conjuncts if isinstance(sentence, And)
+                 else (sentence,))
+    for conjunct in conjuncts:
+        if isinstance(conjunct, Or) and all(map(is_literal, conjunct.disjuncts)):
+            clauses.append([to_literal(disjunct, variables, clauses)
+                            for disjunct in conjunct.disjuncts])
+        else:
+            clauses.append([to_literal(conjunct, variables, clauses)])
+    return clauses
 
 
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
+# Largest number of symbols checked with the bit-parallel truth table
+TRUTH_TABLE_LIMIT = 24
+
+# Number of symbols enumerated within a single chunk of the truth table
+TRUTH_TABLE_CHUNK = 16
+
+
+def truth_table_chunks(symbols):
+    """
+    Yields (columns, ones) pairs that together cover every model of symbols.
+
+    Each chunk encodes 2 ** k models as the bits of Python integers: columns
+    maps each symbol to the integer whose bit r is set when the symbol is true
+    in model r, and ones has a bit set for every model in the chunk.
+    """
+    symbols = sorted(symbols)
+    k = min(len(symbols), TRUTH_TABLE_CHUNK)
+    width = 1 << k
+    ones = (1 << width) - 1
+
+    # The low symbols alternate within a chunk: symbol i is true in runs
+    # of 2 ** i models, so its column is a repeated block of zeros then ones
+    low = dict()
+    for i, symbol in enumerate(symbols[:k]):
+        run = 1 << i
+        block = ((1 << run) - 1) << run
+        repeat = ones // ((1 << (2 * run)) - 1)
+        low[symbol] = block * repeat
+
+    # The high symbols are constant within a chunk
+    high = symbols[k:]
+    for chunk in range(1 << len(high)):
+        columns = dict(low)
+        for j, symbol in enumerate(high):
+            columns[symbol] = ones if chunk >> j & 1 else 0
+        yield columns, ones
+
+
+def truth_table_check(knowledge, query, symbols):
+    """Checks if knowledge base entails query over a bit-parallel truth table."""
+    for columns, ones in truth_table_chunks(symbols):
+
+        # Any model where knowledge holds but query does not is a counterexample
+        knowledge_bits = knowledge.evaluate_bits(columns, ones)
+        if knowledge_bits and knowledge_bits & ~query.evaluate_bits(columns, ones):
+            return False
+    return True
+
+
+def enumeration_check(knowledge, query, symbols):
+    """Checks if knowledge base entails query by enumerating every model."""
 
     def check_all(knowledge, query, symbols, model):
         """Checks if knowledge base entails query, given a particular model."""
@@ -256,8 +620,161 @@ def model_check(knowledge, query):
             return (check_all(knowledge, query, remaining, model_true) and
                     check_all(knowledge, query, remaining, model_false))
 
+    return check_all(knowledge, query, set(symbols), dict())
+
+
+def model_check(knowledge, query, simplify_first=True):
+    """
+    Checks if knowledge base entails query.
+
+    Unless simplify_first is false, both are simplified before checking.
+    """
+    if simplify_first:
+        knowledge = simplify(knowledge)
+        query = simplify(query)
+
     # Get all symbols in both knowledge and query
     symbols = set.union(knowledge.symbols(), query.symbols())
 
+    # Small enough to evaluate every model at once
+    if len(symbols) <= TRUTH_TABLE_LIMIT:
+        return truth_table_check(knowledge, query, symbols)
+
     # Check that knowledge entails query
-    return check_all(knowledge, query, symbols, dict())
+    return enumeration_check(knowledge, query, symbols)
+
+
+def model_check_all(knowledge, queries, simplify_first=True):
+    """
+    Checks many queries against one knowledge base in a single pass.
+
+    Returns a pair of sets (entailed, refuted): the queries that are true in
+    every model of the knowledge base, and those that are false in every one.
+    Unless simplify_first is false, the knowledge base is simplified first.
+    """
+    if simplify_first:
+        knowledge = simplify(knowledge)
+
+    # Queries still consistent with every model of the knowledge base so far
+    entailed = set(queries)
+    refuted = set(queries)
+
+    # Get all symbols in the knowledge base and every query
+    symbols = set.union(knowledge.symbols(),
+                        *[query.symbols() for query in entailed])
+
+    if len(symbols) <= TRUTH_TABLE_LIMIT:
+        for columns, ones in truth_table_chunks(symbols):
+            knowledge_bits = knowledge.evaluate_bits(columns, ones)
+            if not knowledge_bits:
+                continue
+
+            # A query true in some model rules out refutation, and vice versa
+            for query in entailed | refuted:
+                query_bits = query.evaluate_bits(columns, ones)
+                if knowledge_bits & ~query_bits:
+                    entailed.discard(query)
+                if knowledge_bits & query_bits:
+                    refuted.discard(query)
+            if not entailed and not refuted:
+                break
+        return entailed, refuted
+
+    def check_all(symbols, model):
+        """Narrows the candidate queries using every model of knowledge."""
+
+        # Stop enumerating once no query can be entailed or refuted
+        if not entailed and not refuted:
+            return
+
+        # If model has an assignment for each symbol
+        if not symbols:
+            if knowledge.evaluate(model):
+                for query in entailed | refuted:
+                    if query.evaluate(model):
+                        refuted.discard(query)
+                    else:
+                        entailed.discard(query)
+            return
+
+        # Choose one of the remaining unused symbols and try both values
+        remaining = symbols.copy()
+        p = remaining.pop()
+        for value in (True, False):
+            model_value = model.copy()
+            model_value[p] = value
+            check_all(remaining, model_value)
+
+    check_all(symbols, dict())
+    return entailed, refuted
+
+
+class KnowledgeBase():
+    """
+    Knowledge base that grows one sentence at a time and answers queries
+    with an incremental SAT solver.
+
+    Sentences are encoded into clauses once when told, and the solver keeps
+    its learned clauses and propagated facts between calls, so asking many
+    related queries or telling one more sentence never starts from scratch.
+    """
+
+    def __init__(self, *sentences):
+        self.solver = Solver()
+        self.variables = dict()
+        for sentence in sentences:
+            self.tell(sentence)
+
+    def literal(self, sentence):
+        """Returns the solver literal for a sentence, encoding it if needed."""
+        clauses = []
+        literal = to_literal(simplify(sentence), self.variables, clauses)
+        for clause in clauses:
+            self.solver.add_clause(clause)
+        self.solver.reserve(abs(literal))
+        return literal
+
+    def tell(self, sentence):
+        """Adds a sentence to the knowledge base."""
+        for clause in to_clauses(simplify(sentence), self.variables):
+            self.solver.add_clause(clause)
+
+    def satisfiable(self, assumptions=()):
+        """Checks if the knowledge base is consistent with the assumptions."""
+        return self.solver.solve([self.literal(assumption)
+                                  for assumption in assumptions])
+
+    def ask(self, query, assumptions=()):
+        """Checks if the knowledge base and assumptions entail the query."""
+        literals = [self.literal(assumption) for assumption in assumptions]
+        return not self.solver.solve(literals + [-self.literal(query)])
+
+    def ask_all(self, queries, assumptions=()):
+        """
+        Checks many queries at once. Returns a pair of sets (entailed,
+        refuted) like model_check_all.
+        """
+        literals = [self.literal(assumption) for assumption in assumptions]
+        queries = {query: self.literal(query) for query in queries}
+        entailed = set(queries)
+        refuted = set(queries)
+        if not self.solver.solve(literals):
+            return entailed, refuted
+
+        def narrow():
+            """Rules out what the solver's current model contradicts."""
+            for query, literal in queries.items():
+                if self.solver.value(literal) == 1:
+                    refuted.discard(query)
+                else:
+                    entailed.discard(query)
+
+        narrow()
+
+        # Each query still in doubt needs a model that goes the other way
+        for query, literal in queries.items():
+            if query in entailed and self.solver.solve(literals + [-literal]):
+                narrow()
+            if query in refuted and self.solver.solve(literals + [literal]):
+                narrow()
+        return entailed, refuted
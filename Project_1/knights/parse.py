@@ -0,0 +1,299 @@
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+
+from logic import (FALSE, TRUE, And, Biconditional, Implication, Not, Or,
+                   Sentence, Symbol, to_clauses)
+
+# Number of characters read from a file at a time
+CHUNK_SIZE = 1 << 20
+
+# Operators and constants, or a symbol name: any run of text without
+# operator characters
+TOKEN = re.compile(
+    r"\s*(?:(<=>|=>|[¬∧∨()⊤⊥])|([^¬∧∨()⊤⊥<=\s][^¬∧∨()⊤⊥<=]*))")
+
+# The constants by how Sentence.formula() writes them
+CONSTANTS = {"⊤": TRUE, "⊥": FALSE}
+
+# Binding strength of each binary operator; ¬ binds tighter than all of them
+PRECEDENCE = {"∧": 3, "∨": 2, "=>": 1, "<=>": 0}
+
+
+def tokenize(chunks):
+    """
+    Yields (token, offset) pairs from an iterable of text chunks.
+
+    Operators are yielded as themselves, ⊤ and ⊥ as TRUE and FALSE, and
+    symbol names as Symbols. Tokens may span chunk boundaries.
+    """
+    buffer = ""
+    base = 0
+    pos = 0
+    chunks = iter(chunks)
+    eof = False
+
+    # Symbols are looked up by name rather than constructed for every mention
+    symbols = dict()
+    match_token = TOKEN.match
+    while True:
+        match = match_token(buffer, pos)
+
+        # A token touching the end of the buffer may continue in the next chunk
+        if match is None or (match.end() == len(buffer) and not eof):
+            if eof:
+                if buffer[pos:].strip():
+                    raise ValueError(
+                        f"unexpected {buffer[pos:].strip()[:20]!r} "
+                        f"at offset {base + pos}")
+                return
+            buffer = buffer[pos:]
+            base += pos
+            pos = 0
+            chunk = next(chunks, None)
+            if chunk is None:
+                eof = True
+            else:
+                buffer += chunk
+            continue
+
+        pos = match.end()
+        operator, name = match.groups()
+        if operator:
+            yield CONSTANTS.get(operator, operator), base + match.start(1)
+        else:
+            name = name.rstrip()
+            symbol = symbols.get(name)
+            if symbol is None:
+                symbol = symbols[name] = Symbol(name)
+            yield symbol, base + match.start(2)
+
+
+def parse(chunks):
+    """
+    Parses a sentence written in the syntax of Sentence.formula() from an
+    iterable of text chunks.
+
+    Runs of the same ∧ or ∨ operator become a single And or Or, => is right
+    associative, and ⊤ and ⊥ are the empty And() and Or(), so that parsing
+    the formula of any sentence gives back the same sentence. An empty input
+    is also And().
+    """
+    operands = []
+
+    # Pending operators: "(" markers, "¬", or [operator, number of operands]
+    operators = []
+
+    def reduce():
+        """Applies the operator on top of the stack to its operands."""
+        top = operators.pop()
+        if top == "¬":
+            operands.append(Not(operands.pop()))
+            return
+        operator, arity = top
+        args = operands[-arity:]
+        del operands[-arity:]
+        if operator == "∧":
+            operands.append(And(*args))
+        elif operator == "∨":
+            operands.append(Or(*args))
+        elif operator == "=>":
+            operands.append(Implication(*args))
+        else:
+            operands.append(Biconditional(*args))
+
+    def reduce_while(precedence):
+        """Applies pending operators that bind at least as tightly."""
+        while operators and operators[-1] != "(" and (
+            operators[-1] == "¬" or PRECEDENCE[operators[-1][0]] > precedence
+        ):
+            reduce()
+
+    expect_operand = True
+    offset = 0
+    for token, offset in tokenize(chunks):
+        if expect_operand:
+            if isinstance(token, Sentence):
+                operands.append(token)
+                expect_operand = False
+            elif token in ("¬", "("):
+                operators.append(token)
+            else:
+                raise ValueError(f"unexpected {token!r} at offset {offset}")
+        elif token == ")":
+            reduce_while(-1)
+            if not operators:
+                raise ValueError(f"unbalanced ')' at offset {offset}")
+            operators.pop()
+        elif token in PRECEDENCE:
+            precedence = PRECEDENCE[token]
+
+            # => groups to the right, so only stronger operators reduce first
+            if token == "=>":
+                reduce_while(precedence)
+            else:
+                reduce_while(precedence)
+                top = operators[-1] if operators else None
+                if isinstance(top, list) and top[0] == token and \
+                        token in ("∧", "∨"):
+                    top[1] += 1
+                    expect_operand = True
+                    continue
+                if token == "<=>" and isinstance(top, list) and \
+                        top[0] == token:
+                    reduce()
+            operators.append([token, 2])
+            expect_operand = True
+        else:
+            raise ValueError(f"unexpected {token!r} at offset {offset}")
+
+    if expect_operand:
+        if operands or operators:
+            raise ValueError(f"unexpected end of input at offset {offset}")
+        return And()
+    reduce_while(-1)
+    if operators:
+        raise ValueError("unbalanced '('")
+    return operands[0]
+
+
+def parse_formula(text):
+    """Parses a sentence from a string in the syntax of Sentence.formula()."""
+    return parse([text])
+
+
+def parse_file(path):
+    """Parses a sentence from a file, reading it in chunks."""
+    with open(path, encoding="utf-8") as f:
+        return parse(iter(lambda: f.read(CHUNK_SIZE), ""))
+
+
+def read_clauses(lines, names):
+    """
+    Yields the clauses of a DIMACS CNF file as tuples of integer literals.
+
+    Comment lines of the form "c symbol <n> <name>", as written by
+    write_dimacs, are recorded in names as variable number to symbol name.
+    """
+    clause = []
+    for line in lines:
+        if line.startswith("c"):
+            parts = line.split(None, 3)
+            if len(parts) == 4 and parts[1] == "symbol":
+                names[int(parts[2])] = parts[3].rstrip("\n")
+            continue
+        if line.startswith("p") or line.startswith("%"):
+            continue
+        for literal in map(int, line.split()):
+            if literal == 0:
+                yield tuple(clause)
+                clause = []
+            else:
+                clause.append(literal)
+    if clause:
+        yield tuple(clause)
+
+
+def read_dimacs(path):
+    """
+    Reads a DIMACS CNF file as an And of Or clauses. Variables without a
+    symbol comment are named by their number, like "v12".
+    """
+    names = dict()
+    literals = dict()
+
+    def literal(n):
+        if n not in literals:
+            symbol = Symbol(names.get(abs(n), f"v{abs(n)}"))
+            literals[n] = symbol if n > 0 else Not(symbol)
+        return literals[n]
+
+    with open(path, encoding="utf-8") as f:
+        return And(*[Or(*map(literal, clause))
+                     for clause in read_clauses(f, names)])
+
+
+def write_dimacs(sentence, path):
+    """
+    Writes a sentence to a DIMACS CNF file, adding auxiliary variables for
+    subformulas that are not clauses. Symbol names are kept in comments.
+    """
+    variables = dict()
+    clauses = to_clauses(sentence, variables)
+    with open(path, "w", encoding="utf-8") as f:
+        for name, number in variables.items():
+            if isinstance(name, str):
+                f.write(f"c symbol {number} {name}\n")
+        f.write(f"p cnf {len(variables)} {len(clauses)}\n")
+        for clause in clauses:
+            f.write(" ".join(map(str, clause)) + " 0\n")
+
+
+def random_formula(symbols, depth):
+    """Returns a random sentence over the given symbols."""
+    if depth == 0 or random.random() < 0.1:
+        sentence = random.choice(symbols)
+        return Not(sentence) if random.random() < 0.3 else sentence
+    kind = random.randrange(4)
+    if kind == 0:
+        return And(*[random_formula(symbols, depth - 1) for _ in range(3)])
+    if kind == 1:
+        return Or(*[random_formula(symbols, depth - 1) for _ in range(3)])
+    if kind == 2:
+        return Implication(random_formula(symbols, depth - 1),
+                           random_formula(symbols, depth - 1))
+    return Biconditional(random_formula(symbols, depth - 1),
+                         random_formula(symbols, depth - 1))
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python parse.py [megabytes]")
+    megabytes = float(sys.argv[1]) if len(sys.argv) == 2 else 4
+
+    # Check that the formulas of the constants and of random sentences
+    # over them parse back to the same sentences
+    random.seed(0)
+    symbols = [Symbol(f"P{i} is a Knight") for i in range(200)]
+    for sentence in [TRUE, FALSE] + [
+            random_formula(symbols[:4] + [TRUE, FALSE], 4) for _ in range(1000)]:
+        if parse_formula(sentence.formula()) is not sentence:
+            sys.exit(f"Round trip failed for {sentence.formula()!r}")
+
+    # Build a formula of the requested size out of many random conjuncts
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "formula.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            written = 0
+            first = True
+            while written < megabytes * 1e6:
+                text = ("" if first else " ∧ ") + \
+                    "(" + random_formula(symbols, 6).formula() + ")"
+                f.write(text)
+                written += len(text.encode("utf-8"))
+                first = False
+        size = os.path.getsize(path)
+
+        start = time.perf_counter()
+        sentence = parse_file(path)
+        elapsed = time.perf_counter() - start
+        print(f"Parsed {size / 1e6:.1f} MB formula with "
+              f"{len(sentence.conjuncts)} conjuncts in {elapsed:.2f}s "
+              f"({size / 1e6 / elapsed:.1f} MB/s)")
+
+        path = os.path.join(directory, "formula.cnf")
+        start = time.perf_counter()
+        write_dimacs(sentence, path)
+        written = time.perf_counter() - start
+        start = time.perf_counter()
+        read_dimacs(path)
+        read = time.perf_counter() - start
+        print(f"Wrote {os.path.getsize(path) / 1e6:.1f} MB DIMACS in "
+              f"{written:.2f}s, read it back in {read:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+import heapq
+
+
+class Solver():
+    """
+    Incremental SAT solver over clauses in the integer format produced by
+    logic.to_clauses: variable n is the literal n, and its negation -n.
+
+    Uses unit propagation with two watched literals per clause, learns a
+    clause from every conflict, and keeps everything it has learned and
+    every fact propagated without assumptions across calls to solve(), so
+    adding clauses and solving again never starts over.
+    """
+
+    def __init__(self):
+        # False once the clauses are known to be unsatisfiable
+        self.ok = True
+
+        # values[v] is 1 if variable v is true, -1 if false, 0 if unassigned
+        self.values = [0]
+        self.levels = [0]
+        self.reasons = [None]
+        self.activity = [0.0]
+        self.order = []
+        self.increment = 1.0
+
+        # Clauses watching each literal, checked when it becomes false
+        self.watches = dict()
+        self.clauses = []
+        self.learned = []
+
+        # Assigned literals in order, and where each decision level starts
+        self.trail = []
+        self.trail_limits = []
+        self.propagated = 0
+
+    def value(self, literal):
+        """Returns 1 if literal is true, -1 if false and 0 if unassigned."""
+        value = self.values[abs(literal)]
+        return value if literal > 0 else -value
+
+    def reserve(self, variable):
+        """Makes room for every variable up to the given one."""
+        while len(self.values) <= variable:
+            v = len(self.values)
+            self.values.append(0)
+            self.levels.append(0)
+            self.reasons.append(None)
+            self.activity.append(0.0)
+            self.watches[v] = []
+            self.watches[-v] = []
+            heapq.heappush(self.order, (0.0, v))
+
+    def level(self):
+        """Returns the current decision level."""
+        return len(self.trail_limits)
+
+    def add_clause(self, clause):
+        """
+        Adds a clause permanently. Returns False if the clauses have become
+        unsatisfiable.
+        """
+        if not self.ok:
+            return False
+        self.backtrack(0)
+        self.reserve(max(map(abs, clause), default=0))
+
+        # Drop duplicate and false literals, and clauses already satisfied
+        literals = dict()
+        for literal in clause:
+            value = self.value(literal)
+            if value == 1 or -literal in literals:
+                return True
+            if value == 0:
+                literals[literal] = None
+        literals = list(literals)
+
+        if not literals:
+            self.ok = False
+        elif len(literals) == 1:
+            self.assign(literals[0], None)
+            self.ok = self.propagate() is None
+        else:
+            self.watch(literals)
+            self.clauses.append(literals)
+        return self.ok
+
+    def watch(self, clause):
+        self.watches[clause[0]].append(clause)
+        self.watches[clause[1]].append(clause)
+
+    def assign(self, literal, reason):
+        v = abs(literal)
+        self.values[v] = 1 if literal > 0 else -1
+        self.levels[v] = self.level()
+        self.reasons[v] = reason
+        self.trail.append(literal)
+
+    def propagate(self):
+        """
+        Assigns every literal implied by unit clauses. Returns a clause
+        that has become false, or None if there is no conflict.
+        """
+        values = self.values
+        while self.propagated < len(self.trail):
+            false = -self.trail[self.propagated]
+            self.propagated += 1
+            watching = self.watches[false]
+            kept = []
+            for i, clause in enumerate(watching):
+
+                # Keep the false literal in the second watched position
+                if clause[0] == false:
+                    clause[0], clause[1] = clause[1], false
+                first = clause[0]
+                first_value = values[first] if first > 0 else -values[-first]
+                if first_value == 1:
+                    kept.append(clause)
+                    continue
+
+                # Look for another literal that is not false to watch instead
+                for k in range(2, len(clause)):
+                    literal = clause[k]
+                    if (values[literal] if literal > 0
+                            else -values[-literal]) != -1:
+                        clause[1], clause[k] = literal, false
+                        self.watches[literal].append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if first_value == -1:
+                        kept.extend(watching[i + 1:])
+                        self.watches[false] = kept
+                        self.propagated = len(self.trail)
+                        return clause
+                    self.assign(first, clause)
+            self.watches[false] = kept
+        return None
+
+    def backtrack(self, level):
+        """Undoes every assignment made above the given decision level."""
+        if self.level() <= level:
+            return
+        limit = self.trail_limits[level]
+        for literal in self.trail[limit:]:
+            v = abs(literal)
+            self.values[v] = 0
+            self.reasons[v] = None
+            heapq.heappush(self.order, (-self.activity[v], v))
+        del self.trail[limit:]
+        del self.trail_limits[level:]
+        self.propagated = len(self.trail)
+
+    def bump(self, v):
+        """Raises the priority of a variable involved in a conflict."""
+        self.activity[v] += self.increment
+        if self.activity[v] > 1e100:
+            self.activity = [a * 1e-100 for a in self.activity]
+            self.increment *= 1e-100
+        heapq.heappush(self.order, (-self.activity[v], v))
+
+    def analyze(self, conflict):
+        """
+        Derives a learned clause from a conflict, cutting the implication
+        graph at the first unique implication point. Returns the clause,
+        with its asserting literal first, and the level to backtrack to.
+        """
+        seen = set()
+        learned = [None]
+        pending = 0
+        literal = None
+        index = len(self.trail) - 1
+        clause = conflict
+        while True:
+            for q in clause:
+                v = abs(q)
+                if q == literal or v in seen or self.levels[v] == 0:
+                    continue
+                seen.add(v)
+                self.bump(v)
+                if self.levels[v] == self.level():
+                    pending += 1
+                else:
+                    learned.append(q)
+
+            # Walk back to the next literal of this level in the conflict
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            literal = self.trail[index]
+            index -= 1
+            pending -= 1
+            if pending == 0:
+                break
+            clause = self.reasons[abs(literal)]
+        learned[0] = -literal
+        self.increment /= 0.95
+
+        if len(learned) == 1:
+            return learned, 0
+
+        # Watch the literal from the highest remaining level second
+        highest = max(range(1, len(learned)),
+                      key=lambda i: self.levels[abs(learned[i])])
+        learned[1], learned[highest] = learned[highest], learned[1]
+        return learned, self.levels[abs(learned[1])]
+
+    def decide(self):
+        """Returns the unassigned variable with the highest activity."""
+        while self.order:
+            _, v = heapq.heappop(self.order)
+            if self.values[v] == 0:
+                return v
+        return None
+
+    def solve(self, assumptions=()):
+        """
+        Checks if the clauses are satisfiable with every literal in
+        assumptions true. Learned clauses remain valid without the
+        assumptions and are kept for later calls.
+        """
+        if not self.ok:
+            return False
+        self.backtrack(0)
+        self.reserve(max(map(abs, assumptions), default=0))
+        if self.propagate() is not None:
+            self.ok = False
+            return False
+
+        conflicts = 0
+        restart = 100
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                if self.level() == 0:
+                    self.ok = False
+                    return False
+                learned, level = self.analyze(conflict)
+                self.backtrack(level)
+                if len(learned) == 1:
+                    self.assign(learned[0], None)
+                else:
+                    self.watch(learned)
+                    self.learned.append(learned)
+                    self.assign(learned[0], learned)
+
+                # Restart now and then, keeping what has been learned
+                conflicts += 1
+                if conflicts >= restart:
+                    conflicts = 0
+                    restart = int(restart * 1.5)
+                    self.backtrack(0)
+                continue
+
+            # Assumptions are decided first, one per decision level
+            if self.level() < len(assumptions):
+                literal = assumptions[self.level()]
+                value = self.value(literal)
+                if value == -1:
+                    return False
+                self.trail_limits.append(len(self.trail))
+                if value == 0:
+                    self.assign(literal, None)
+                continue
+
+            v = self.decide()
+            if v is None:
+                return True
+            self.trail_limits.append(len(self.trail))
+            self.assign(-v, None)
+
+    def model(self):
+        """Returns the set of true variables after a satisfiable solve()."""
+        return {v for v in range(1, len(self.values)) if self.values[v] == 1}
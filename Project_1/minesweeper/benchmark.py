@@ -0,0 +1,146 @@
+import random
+import sys
+import time
+import tracemalloc
+
+from minesweeper import BitSentence, Minesweeper, MinesweeperAI, Sentence
+from simulate import play_game
+
+
+def compare_sentences(height, width):
+    """
+    Compares Sentence and BitSentence on one sentence per cell of a board,
+    each covering the cell's neighbors: memory to hold them all, and time to
+    build them, test and subtract neighboring pairs, and mark cells.
+    """
+    random.seed(0)
+    neighborhoods = []
+    for i in range(height):
+        for j in range(width):
+            cells = {
+                (a, b)
+                for a in range(max(0, i - 1), min(height, i + 2))
+                for b in range(max(0, j - 1), min(width, j + 2))
+            }
+            neighborhoods.append((cells, random.randint(0, len(cells))))
+
+    # A strictly smaller sentence inside each neighborhood to subtract
+    inner = [(set(list(cells)[:len(cells) // 2]), count // 2)
+             for cells, count in neighborhoods]
+
+    kinds = {
+        "Sentence": lambda cells, count: Sentence(cells, count),
+        "BitSentence": lambda cells, count: BitSentence(cells, count, width),
+    }
+    print(f"{height}x{width} board, {len(neighborhoods)} sentences")
+    for name, make in kinds.items():
+        tracemalloc.start()
+        sentences = [make(cells, count) for cells, count in neighborhoods]
+        memory, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del sentences
+
+        start = time.perf_counter()
+        sentences = [make(cells, count) for cells, count in neighborhoods]
+        subsets = [make(cells, count) for cells, count in inner]
+        build = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for sentence, subset in zip(sentences, subsets):
+            if subset.issubset(sentence):
+                sentence.difference(subset)
+        for a, b in zip(sentences, sentences[1:]):
+            a.issubset(b)
+            b.issubset(a)
+        operations = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for k, sentence in enumerate(sentences):
+            sentence.mark_safe(divmod(k, width))
+            sentence.mark_mine(divmod(k + 1, width))
+        marks = time.perf_counter() - start
+
+        print(f"  {name:<12} {memory / len(neighborhoods):8.1f} bytes each, "
+              f"build {build:.3f}s, subset/difference {operations:.3f}s, "
+              f"mark {marks:.3f}s")
+
+
+def compare_engines(height, width, mines, games):
+    """
+    Compares the subset and linear inference engines on the same boards.
+    Each engine is told the counts of the same random half of the safe
+    cells, in the same order, and is scored on how many other cells it
+    concludes are mines or safe, and how many per millisecond of inference.
+    """
+    totals = {engine: [0, 0.0] for engine in ("subset", "linear")}
+    for seed in range(games):
+        random.seed(seed)
+        game = Minesweeper(height=height, width=width, mines=mines)
+        safes = [(i, j) for i in range(height) for j in range(width)
+                 if (i, j) not in game.mines]
+        random.shuffle(safes)
+        revealed = safes[:len(safes) // 2]
+
+        for engine, total in totals.items():
+            ai = MinesweeperAI(height=height, width=width, mines=mines,
+                               engine=engine)
+            start = time.perf_counter()
+            for cell in revealed:
+                ai.add_knowledge(cell, game.nearby_mines(cell))
+            total[1] += time.perf_counter() - start
+            total[0] += len((ai.mines | ai.safes) - ai.moves_made)
+
+    print(f"{games} boards of {height}x{width} with {mines} mines, "
+          f"half the safe cells revealed")
+    for engine, (deductions, elapsed) in totals.items():
+        print(f"  {engine:<7} {deductions:>8} deductions, "
+              f"{elapsed * 1000:10.1f} ms, "
+              f"{deductions / max(elapsed * 1000, 1e-9):8.2f} per ms")
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "sentences":
+        height = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+        width = int(sys.argv[3]) if len(sys.argv) > 3 else 300
+        compare_sentences(height, width)
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == "engines":
+        height = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+        width = int(sys.argv[3]) if len(sys.argv) > 3 else 100
+        mines = int(sys.argv[4]) if len(sys.argv) > 4 else 2000
+        games = int(sys.argv[5]) if len(sys.argv) > 5 else 5
+        compare_engines(height, width, mines, games)
+        return
+
+    if len(sys.argv) > 6:
+        sys.exit("Usage: python benchmark.py "
+                 "[height] [width] [mines] [games] [max_moves]\n"
+                 "       python benchmark.py sentences [height] [width]\n"
+                 "       python benchmark.py engines "
+                 "[height] [width] [mines] [games]")
+    height = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    width = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    mines = int(sys.argv[3]) if len(sys.argv) > 3 else 1500
+    games = int(sys.argv[4]) if len(sys.argv) > 4 else 5
+    max_moves = int(sys.argv[5]) if len(sys.argv) > 5 else None
+
+    moves = 0
+    wins = 0
+    inference = 0.0
+    for seed in range(games):
+        stats = play_game(height, width, mines, seed, max_moves=max_moves)
+        moves += stats["moves"]
+        inference += stats["inference"]
+        wins += stats["result"] == "won"
+        print(f"Game {seed}: {stats['result']} after "
+              f"{stats['moves']} moves, "
+              f"{stats['inference'] / max(stats['moves'], 1) * 1000:.3f} ms "
+              f"inference per move, "
+              f"up to {max(stats['knowledge'], default=0)} sentences")
+    print(f"{height}x{width} with {mines} mines: won {wins} of {games}, "
+          f"{moves} moves, "
+          f"{inference / max(moves, 1) * 1000:.3f} ms inference per move")
+
+
+if __name__ == "__main__":
+    main()
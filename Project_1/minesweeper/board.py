@@ -0,0 +1,116 @@
+from collections import deque
+
+import numpy as np
+
+
+class ArrayMinesweeper:
+    """
+    Minesweeper game representation backed by NumPy arrays, for large
+    boards. Offers the same methods as minesweeper.Minesweeper, plus
+    reveal() to open whole regions of cells with no nearby mines.
+    """
+
+    def __init__(self, height=8, width=8, mines=8, seed=None):
+        self.height = height
+        self.width = width
+        rng = np.random.default_rng(seed)
+
+        # Place mines by sampling distinct cells, with no rejection loop
+        self.board = np.zeros((height, width), dtype=bool)
+        self.board.flat[rng.choice(height * width, size=mines, replace=False)] = True
+
+        # Count every cell's neighboring mines at once: the 3x3 box sum of
+        # the padded board, less the cell itself, as a sum of shifted views
+        padded = np.pad(self.board, 1).astype(np.uint8)
+        self.counts = np.zeros((height, width), dtype=np.uint8)
+        for di in range(3):
+            for dj in range(3):
+                if (di, dj) != (1, 1):
+                    self.counts += padded[di:di + height, dj:dj + width]
+
+        # Revealed cells, kept in a bytearray that the array view shares so
+        # the flood fill can mark cells without going through NumPy
+        self._revealed = bytearray(height * width)
+        self.revealed = np.frombuffer(self._revealed, dtype=bool).reshape(
+            (height, width))
+        self._mines = None
+        self._cells = None
+
+        # At first, player has found no mines
+        self.mines_found = set()
+
+    @property
+    def mines(self):
+        """The set of all mine cells, built on first use."""
+        if self._mines is None:
+            self._mines = {
+                (int(i), int(j)) for i, j in np.argwhere(self.board)
+            }
+        return self._mines
+
+    def print(self):
+        """
+        Prints a text-based representation
+        of where mines are located.
+        """
+        for i in range(self.height):
+            print("--" * self.width + "-")
+            print("".join("|X" if mine else "| " for mine in self.board[i]) + "|")
+        print("--" * self.width + "-")
+
+    def is_mine(self, cell):
+        return bool(self.board[cell])
+
+    def nearby_mines(self, cell):
+        """
+        Returns the number of mines that are
+        within one row and column of a given cell,
+        not including the cell itself.
+        """
+        return int(self.counts[cell])
+
+    def reveal(self, cell):
+        """
+        Reveals a safe cell and returns a list of (cell, nearby mines) pairs
+        for it and every cell newly revealed with it: when a cell has no
+        nearby mines, all its neighbors are revealed too, flooding the whole
+        region. Returns an empty list if the cell was already revealed.
+        """
+        i, j = cell
+        width = self.width
+        start = i * width + j
+        revealed = self._revealed
+        if revealed[start]:
+            return []
+
+        # Search over flat indices using plain Python lists, which are much
+        # faster to index one cell at a time than NumPy arrays; the list of
+        # counts is built once, with -1 standing for a mine
+        if self._cells is None:
+            self._cells = np.where(self.board, -1, self.counts).ravel().tolist()
+        cells = self._cells
+        revealed[start] = 1
+        result = [((i, j), cells[start])]
+        if cells[start] != 0:
+            return result
+
+        queue = deque([start])
+        while queue:
+            index = queue.popleft()
+            ci, cj = divmod(index, width)
+            for ni in range(max(0, ci - 1), min(self.height, ci + 2)):
+                for nj in range(max(0, cj - 1), min(width, cj + 2)):
+                    neighbor = ni * width + nj
+                    if revealed[neighbor]:
+                        continue
+                    revealed[neighbor] = 1
+                    result.append(((ni, nj), cells[neighbor]))
+                    if cells[neighbor] == 0:
+                        queue.append(neighbor)
+        return result
+
+    def won(self):
+        """
+        Checks if all mines have been flagged.
+        """
+        return self.mines_found == self.mines
@@ -0,0 +1,176 @@
+import math
+
+
+class LinearSystem:
+    """
+    Minesweeper knowledge as a system of linear equations over cells.
+
+    Each unknown cell is a variable that is 1 for a mine and 0 for a safe
+    cell, and each sentence is an equation saying that its cells sum to its
+    count. Equations are kept in reduced row echelon form with integer
+    coefficients: every row has a pivot cell that appears in no other row.
+    Rows are sparse dictionaries, and each cell is indexed by the pivots of
+    the rows that mention it, so adding an equation or a known cell only
+    touches the rows that share cells with it.
+
+    Elimination combines any number of sentences, so it finds conclusions
+    that comparing sentences two at a time misses. Conclusions are drawn
+    from each changed row by bounds reasoning: a cell is forced to one value
+    when the other value would put the row's sum out of reach.
+    """
+
+    def __init__(self):
+        # Maps each pivot cell to its row: [coefficients by cell, total]
+        self.rows = dict()
+
+        # Maps each cell to the set of pivots of the rows that mention it
+        self.columns = dict()
+
+    def __len__(self):
+        return len(self.rows)
+
+    def add(self, cells, count):
+        """
+        Adds the equation that cells hold count mines, and returns a list of
+        (cell, mine) pairs for cells whose values are now forced.
+        """
+        coefficients = {cell: 1 for cell in cells}
+        total = count
+
+        # Eliminate existing pivots; since no row mentions another row's
+        # pivot, this never brings a pivot back in
+        for cell in list(coefficients):
+            if cell in self.rows:
+                coefficients, total = self.eliminate(
+                    coefficients, total, cell, self.rows[cell])
+        return self.insert(coefficients, total)
+
+    def assign(self, cell, value):
+        """
+        Substitutes a known value, 1 for a mine or 0 for a safe cell, into
+        every row, and returns a list of (cell, mine) pairs for cells whose
+        values are now forced.
+        """
+        forced = []
+        changed = []
+        for pivot in self.columns.pop(cell, set()):
+            if pivot == cell:
+                continue
+            row = self.rows[pivot]
+            row[1] -= row[0].pop(cell) * value
+            changed.append(pivot)
+
+        # A row that loses its pivot needs a new one
+        row = self.rows.pop(cell, None)
+        if row is not None:
+            coefficients, total = row
+            total -= coefficients.pop(cell) * value
+            for other in coefficients:
+                self.columns[other].discard(cell)
+            forced.extend(self.insert(coefficients, total))
+
+        for pivot in changed:
+            if pivot in self.rows:
+                forced.extend(self.conclusions(pivot))
+        return forced
+
+    def eliminate(self, coefficients, total, pivot, row):
+        """
+        Returns coefficients and total with the pivot cancelled out by a
+        multiple of row, reduced by the greatest common divisor.
+        """
+        pivot_coefficients, pivot_total = row
+        a = pivot_coefficients[pivot]
+        b = coefficients[pivot]
+        g = math.gcd(a, b)
+        a, b = a // g, b // g
+
+        result = {cell: c * a for cell, c in coefficients.items()}
+        for cell, c in pivot_coefficients.items():
+            value = result.get(cell, 0) - c * b
+            if value:
+                result[cell] = value
+            else:
+                result.pop(cell, None)
+        return self.reduce(result, total * a - pivot_total * b)
+
+    @staticmethod
+    def reduce(coefficients, total):
+        """
+        Divides an equation by the greatest common divisor of its terms.
+        """
+        g = math.gcd(total, *coefficients.values())
+        if g > 1:
+            coefficients = {cell: c // g for cell, c in coefficients.items()}
+            total //= g
+        return coefficients, total
+
+    def insert(self, coefficients, total):
+        """
+        Adds a row that mentions no pivot, choosing the cell in the fewest
+        other rows as its pivot to keep the system sparse, and eliminates
+        that pivot from the other rows. Returns the forced cells.
+        """
+        if not coefficients:
+            # Either redundant, or contradicting the rest of the knowledge
+            return []
+
+        pivot = min(coefficients, key=lambda cell: (
+            len(self.columns.get(cell, ())), cell))
+        if coefficients[pivot] < 0:
+            coefficients = {cell: -c for cell, c in coefficients.items()}
+            total = -total
+        row = [coefficients, total]
+
+        changed = []
+        for other in list(self.columns.get(pivot, ())):
+            other_row = self.rows[other]
+            for cell in other_row[0]:
+                self.columns[cell].discard(other)
+            other_row[0], other_row[1] = self.eliminate(
+                other_row[0], other_row[1], pivot, row)
+            for cell in other_row[0]:
+                self.columns.setdefault(cell, set()).add(other)
+            changed.append(other)
+
+        self.rows[pivot] = row
+        for cell in coefficients:
+            self.columns.setdefault(cell, set()).add(pivot)
+
+        forced = self.conclusions(pivot)
+        for other in changed:
+            forced.extend(self.conclusions(other))
+        return forced
+
+    def conclusions(self, pivot):
+        """
+        Returns (cell, mine) pairs for the cells of a row whose values are
+        forced by the bounds on its sum.
+
+        With every cell 0 or 1, the sum ranges from the total of the
+        negative coefficients to the total of the positive ones. A cell
+        with coefficient c must be 0 if being 1 would leave the rest of the
+        row unable to reach the total, and likewise must be 1.
+        """
+        coefficients, total = self.rows[pivot]
+        low = sum(c for c in coefficients.values() if c < 0)
+        high = sum(c for c in coefficients.values() if c > 0)
+        below = total - low
+        above = high - total
+        largest = max(abs(c) for c in coefficients.values())
+        if below < 0 or above < 0 or min(below, above) >= largest:
+            return []
+
+        forced = []
+        for cell, c in coefficients.items():
+            if c > 0:
+                if below < c:
+                    forced.append((cell, False))
+                elif above < c:
+                    forced.append((cell, True))
+            else:
+                if above < -c:
+                    forced.append((cell, False))
+                elif below < -c:
+                    forced.append((cell, True))
+        return forced
@@ -1,5 +1,12 @@
 import itertools
+import logging
 import random
+from collections import deque
+
+from linear import LinearSystem
+from probability import safest_cell
+
+logger = logging.getLogger(__name__)
 
 
 class Minesweeper:
@@ -99,6 +106,25 @@ class Sentence:
     def __str__(self):
         return f"{self.cells} = {self.count}"
 
+    def key(self):
+        """
+        Returns a hashable key that is equal for equal sentences.
+        """
+        return (frozenset(self.cells), self.count)
+
+    def issubset(self, other):
+        """
+        Returns whether every cell of this sentence is in other.
+        """
+        return self.cells.issubset(other.cells)
+
+    def difference(self, other):
+        """
+        Returns the sentence for the cells of this one not in other, which
+        must be a subset of it, with the remaining count of mines.
+        """
+        return Sentence(self.cells - other.cells, self.count - other.count)
+
     def known_mines(self):
         """
         Returns the set of all cells in self.cells known to be mines.
@@ -143,16 +169,204 @@ class Sentence:
             self.cells.remove(cell)
 
 
+class BitSentence:
+    """
+    Sentence with its cells stored as bits of an integer instead of a set.
+
+    Cell (i, j) is bit i * width + j of the board. To keep the integer small
+    on large boards, the mask is stored shifted down so that its lowest cell
+    is bit 0, with that cell's position kept in offset. Subset tests,
+    differences and marks are then a few integer operations.
+    """
+
+    __slots__ = ("mask", "offset", "count", "width")
+
+    def __init__(self, cells, count, width):
+        self.width = width
+        self.count = count
+        indices = [i * width + j for i, j in cells]
+        self.offset = min(indices, default=0)
+        self.mask = 0
+        for index in indices:
+            self.mask |= 1 << (index - self.offset)
+
+    @classmethod
+    def from_mask(cls, mask, offset, count, width):
+        """
+        Creates a sentence directly from a mask of cells above offset.
+        """
+        sentence = cls.__new__(cls)
+        sentence.mask = mask
+        sentence.offset = offset
+        sentence.count = count
+        sentence.width = width
+        sentence.normalize()
+        return sentence
+
+    def normalize(self):
+        """
+        Shifts the mask so that its lowest cell is bit 0.
+        """
+        if self.mask == 0:
+            self.offset = 0
+            return
+        low = (self.mask & -self.mask).bit_length() - 1
+        self.mask >>= low
+        self.offset += low
+
+    @property
+    def cells(self):
+        cells = set()
+        mask = self.mask
+        while mask:
+            low = mask & -mask
+            index = self.offset + low.bit_length() - 1
+            cells.add(divmod(index, self.width))
+            mask ^= low
+        return cells
+
+    def __len__(self):
+        return self.mask.bit_count()
+
+    def __eq__(self, other):
+        return (self.mask == other.mask and self.offset == other.offset
+                and self.count == other.count)
+
+    def __str__(self):
+        return f"{self.cells} = {self.count}"
+
+    def key(self):
+        """
+        Returns a hashable key that is equal for equal sentences.
+        """
+        return (self.mask, self.offset, self.count)
+
+    def known_mines(self):
+        """
+        Returns the set of all cells in self.cells known to be mines.
+        """
+        if self.count == len(self) and self.count > 0:
+            return self.cells
+        else:
+            return set()
+
+    def known_safes(self):
+        """
+        Returns the set of all cells in self.cells known to be safe.
+        """
+        if self.count == 0:
+            return self.cells
+        else:
+            return set()
+
+    def issubset(self, other):
+        """
+        Returns whether every cell of this sentence is in other.
+        """
+        if self.mask == 0:
+            return True
+        if self.offset < other.offset:
+            return False
+        return (self.mask << (self.offset - other.offset)) & ~other.mask == 0
+
+    def difference(self, other):
+        """
+        Returns the sentence for the cells of this one not in other, which
+        must be a subset of it, with the remaining count of mines.
+        """
+        shift = other.offset - self.offset
+        if shift >= 0:
+            mask = self.mask & ~(other.mask << shift)
+        else:
+            mask = self.mask & ~(other.mask >> -shift)
+        return BitSentence.from_mask(mask, self.offset,
+                                     self.count - other.count, self.width)
+
+    def remove(self, cell):
+        """
+        Removes a cell from the sentence, returning whether it was there.
+        """
+        index = cell[0] * self.width + cell[1] - self.offset
+        if index < 0 or not self.mask >> index & 1:
+            return False
+        self.mask ^= 1 << index
+        if index == 0:
+            self.normalize()
+        return True
+
+    def mark_mine(self, cell):
+        """
+        Updates internal knowledge representation given the fact that
+        a cell is known to be a mine.
+        """
+        if self.remove(cell):
+            self.count -= 1
+
+    def mark_safe(self, cell):
+        """
+        Updates internal knowledge representation given the fact that
+        a cell is known to be safe.
+        """
+        self.remove(cell)
+
+
+class CellPool:
+    """
+    Set of cells that supports adding, removing and choosing a random cell
+    in constant time: cells are kept in a list, with each cell's position
+    in a dictionary so that removal can swap the last cell into its place.
+    """
+
+    def __init__(self, cells=()):
+        self.cells = list(cells)
+        self.positions = {cell: i for i, cell in enumerate(self.cells)}
+
+    def __len__(self):
+        return len(self.cells)
+
+    def __contains__(self, cell):
+        return cell in self.positions
+
+    def __iter__(self):
+        return iter(self.cells)
+
+    def add(self, cell):
+        if cell not in self.positions:
+            self.positions[cell] = len(self.cells)
+            self.cells.append(cell)
+
+    def discard(self, cell):
+        i = self.positions.pop(cell, None)
+        if i is None:
+            return
+        last = self.cells.pop()
+        if i < len(self.cells):
+            self.cells[i] = last
+            self.positions[last] = i
+
+    def last(self):
+        """
+        Returns the most recently added cell still in the pool.
+        """
+        return self.cells[-1]
+
+    def choice(self, rng=random):
+        return rng.choice(self.cells)
+
+
 class MinesweeperAI:
     """
     Minesweeper game player
     """
 
-    def __init__(self, height=8, width=8):
+    def __init__(self, height=8, width=8, mines=None, engine="subset"):
         # Set initial height and width
         self.height = height
         self.width = width
 
+        # Total number of mines on the board, if known, used to weigh guesses
+        self.mine_count = mines
+
         # Keep track of which cells have been clicked on
         self.moves_made = set()
 
@@ -160,8 +374,70 @@ class MinesweeperAI:
         self.mines = set()
         self.safes = set()
 
-        # List of sentences about the game known to be true
-        self.knowledge = []
+        # Cells that could still be played: safe ones not yet played, and
+        # all ones not played and not known to be mines
+        self.safe_moves = CellPool()
+        self.available = CellPool(
+            (i, j) for i in range(height) for j in range(width))
+
+        # Sentences about the game known to be true, keyed by Sentence.key()
+        self.knowledge = dict()
+
+        # Maps each cell to the sentences that mention it, keyed by id
+        self.cell_index = dict()
+
+        # New or changed sentences that still need to be checked for inferences
+        self.pending = deque()
+
+        # Inference engine: "subset" compares sentences that share cells,
+        # "linear" also solves all of them together as linear equations
+        if engine not in ("subset", "linear"):
+            raise ValueError(f"unknown inference engine: {engine}")
+        self.engine = engine
+        self.system = LinearSystem() if engine == "linear" else None
+
+        # Cells the linear system has shown to be mines or safe, not yet marked
+        self.forced = deque()
+
+    def add_sentence(self, sentence):
+        """
+        Adds a sentence to the knowledge base, unless it is empty or already
+        known, indexes it by its cells and queues it for inference.
+        """
+        if not sentence.cells:
+            return
+        key = sentence.key()
+        if key in self.knowledge:
+            return
+        self.knowledge[key] = sentence
+        for cell in sentence.cells:
+            self.cell_index.setdefault(cell, dict())[id(sentence)] = sentence
+        self.pending.append(sentence)
+
+    def update_sentence(self, sentence, cell, mine):
+        """
+        Marks a cell in a sentence as a mine or safe, and re-keys the sentence,
+        dropping it if it has become empty or a duplicate of another sentence.
+        The cell's own index entry must already have been removed.
+        """
+        key = sentence.key()
+        if self.knowledge.get(key) is sentence:
+            del self.knowledge[key]
+
+        if mine:
+            sentence.mark_mine(cell)
+        else:
+            sentence.mark_safe(cell)
+
+        key = sentence.key()
+        if not sentence.cells:
+            return
+        if key in self.knowledge:
+            for other in sentence.cells:
+                del self.cell_index[other][id(sentence)]
+            return
+        self.knowledge[key] = sentence
+        self.pending.append(sentence)
 
     def mark_mine(self, cell):
         """
@@ -169,8 +445,14 @@ class MinesweeperAI:
         to mark that cell as a mine as well.
         """
         self.mines.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_mine(cell)
+        self.available.discard(cell)
+
+        # Only sentences that mention the cell can change, and once marked
+        # the cell is in none of them
+        for sentence in self.cell_index.pop(cell, dict()).values():
+            self.update_sentence(sentence, cell, mine=True)
+        if self.system is not None:
+            self.forced.extend(self.system.assign(cell, 1))
 
     def mark_safe(self, cell):
         """
@@ -178,8 +460,78 @@ class MinesweeperAI:
         to mark that cell as safe as well.
         """
         self.safes.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_safe(cell)
+        if cell not in self.moves_made:
+            self.safe_moves.add(cell)
+        for sentence in self.cell_index.pop(cell, dict()).values():
+            self.update_sentence(sentence, cell, mine=False)
+        if self.system is not None:
+            self.forced.extend(self.system.assign(cell, 0))
+
+    def infer(self):
+        """
+        Draws every conclusion that follows from the pending sentences.
+
+        Each pending sentence either reveals mines or safes directly, or is
+        compared with the sentences that share a cell with it, adding the
+        difference whenever one is a subset of the other. Sentences created
+        or changed along the way are queued in turn, so the knowledge base
+        reaches the same fixpoint as repeated full sweeps, but only new
+        information is ever looked at.
+        """
+        while self.pending:
+            sentence = self.pending.popleft()
+
+            # Skips sentences that have changed or been dropped since queued
+            if self.knowledge.get(sentence.key()) is not sentence:
+                continue
+
+            # Marking a cell re-queues every other sentence that mentions it
+            mines = sentence.known_mines()
+            safes = sentence.known_safes()
+            if mines or safes:
+                for mine in mines.copy():
+                    self.mark_mine(mine)
+                for safe in safes.copy():
+                    self.mark_safe(safe)
+                continue
+
+            neighbors = dict()
+            for cell in sentence.cells:
+                neighbors.update(self.cell_index[cell])
+            del neighbors[id(sentence)]
+
+            for other in neighbors.values():
+                if sentence.cells < other.cells:
+                    self.add_sentence(Sentence(
+                        cells=other.cells - sentence.cells,
+                        count=other.count - sentence.count,
+                    ))
+                elif other.cells < sentence.cells:
+                    self.add_sentence(Sentence(
+                        cells=sentence.cells - other.cells,
+                        count=sentence.count - other.count,
+                    ))
+
+    def infer_linear(self):
+        """
+        Draws conclusions with the linear system as well as by comparing
+        sentences: runs infer(), then marks every cell the system forces,
+        and repeats until neither finds anything new. Elimination combines
+        any number of sentences, while pairwise differences catch the few
+        conclusions that the rows of the system do not show by themselves.
+        """
+        while True:
+            self.infer()
+            if not self.forced:
+                return
+            while self.forced:
+                cell, mine = self.forced.popleft()
+                if cell in self.mines or cell in self.safes:
+                    continue
+                if mine:
+                    self.mark_mine(cell)
+                else:
+                    self.mark_safe(cell)
 
     def add_knowledge(self, cell, count):
         """
@@ -199,6 +551,8 @@ class MinesweeperAI:
 
         # Marks the cell as a move that has been made,
         self.moves_made.add(cell)
+        self.safe_moves.discard(cell)
+        self.available.discard(cell)
         # Marks the cell as safe
         self.mark_safe(cell)
 
@@ -226,52 +580,14 @@ class MinesweeperAI:
                     new_sentence_cells.add((i, j))
 
         # Adds sentence containing new information to knowledge
-        self.knowledge.append(Sentence(cells=new_sentence_cells, count=count))
-
-        # Keeps trying to update information until knowledge base stops changing
-        while True:
-            # This variable keeps track of whether information in the knowledge base is changing
-            change_this_iteration = False
-
-            # Iterates through (a copy of) all sentences, marking mines/safes when information is known
-            for sentence in self.knowledge:
-                for safe in sentence.known_safes().copy():
-                    self.mark_safe(safe)
-                    change_this_iteration = True
+        self.add_sentence(Sentence(cells=new_sentence_cells, count=count))
 
-                for mine in sentence.known_mines().copy():
-                    self.mark_mine(mine)
-                    change_this_iteration = True
-
-            # Removes all empty sentences from knowledge
-            self.knowledge = [
-                sentence for sentence in self.knowledge if len(sentence.cells) != 0
-            ]
-
-            # For all sentences, performs subset comprehension
-            for sentence1 in self.knowledge:
-                for sentence2 in self.knowledge:
-                    # Skips comparisons between the same list
-                    if sentence1 == sentence2:
-                        continue
-
-                    # If sentence1 is a subset of sentence 2, creates a new sentence subtracting sentence1 from sentence2
-                    if sentence1.cells.issubset(sentence2.cells):
-                        # Finds difference between sentence 2 and sentence 1
-                        cell_difference = sentence2.cells - sentence1.cells
-                        count_difference = sentence2.count - sentence1.count
-                        sentence_to_add = Sentence(
-                            cells=cell_difference, count=count_difference
-                        )
-
-                        # Adds new sentence if it isn't already in the knowledge base
-                        if not sentence_to_add in self.knowledge:
-                            self.knowledge.append(sentence_to_add)
-                            change_this_iteration = True
-
-            # Exits the while loop if no change occurs during the iteration
-            if change_this_iteration == False:
-                break
+        # Marks mines and safes, and adds new sentences, until nothing changes
+        if self.system is None:
+            self.infer()
+        else:
+            self.forced.extend(self.system.add(new_sentence_cells, count))
+            self.infer_linear()
 
     def make_safe_move(self):
         """
@@ -283,15 +599,13 @@ class MinesweeperAI:
         and self.moves_made, but should not modify any of those values.
         """
 
-        # Gets available moves by subtracting (cells already checked) from (known safe cells)
-        available_moves = self.safes - self.moves_made
-
-        # If set is empty, returns None. Otherwise, returns the first cell that is available
-        if len(available_moves) == 0:
+        # Safe cells not yet played are kept up to date as cells are marked
+        # and played, so no sets need to be built here
+        if len(self.safe_moves) == 0:
             return None
         else:
-            move = list(available_moves)[0]
-            print(f"making a move at: {move}")
+            move = self.safe_moves.last()
+            logger.info("making a move at: %s", move)
             return move
 
     def make_random_move(self):
@@ -300,23 +614,31 @@ class MinesweeperAI:
         Should choose randomly among cells that:
             1) have not already been chosen, and
             2) are not known to be mines
-        """
 
-        # Gets total moves
-        total_moves = set()
-        for y in range(0, self.height):
-            for x in range(0, self.width):
-                total_moves.add((y, x))
+        If the total number of mines is known, chooses the cell least likely
+        to be a mine given everything in the knowledge base instead.
+        """
 
-        # Gets available moves by subtracting (known mines) and (moves already made) from (all possible moves)
-        available_moves = total_moves - self.moves_made - self.mines
+        # Cells not yet played and not known to be mines are kept up to
+        # date as cells are marked and played
+        available_moves = self.available
 
         # If available moves is empty, returns None.
         if len(available_moves) == 0:
-            print("No available random moves")
+            logger.info("No available random moves")
             return None
-        # Else, returns random move in available moves
-        else:
-            move = random.choice(list(available_moves))
-            print(f"RANDOM MOVE AT: {move}")
-            return move
+        # Guesses the safest cell if the number of mines is known
+        move = None
+        if self.mine_count is not None and self.knowledge:
+            move = safest_cell(
+                [(sentence.cells, sentence.count)
+                 for sentence in self.knowledge.values()],
+                available_moves,
+                self.mine_count - len(self.mines),
+            )
+
+        # Otherwise, returns random move in available moves
+        if move is None:
+            move = available_moves.choice()
+        logger.info("RANDOM MOVE AT: %s", move)
+        return move
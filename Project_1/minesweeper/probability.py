@@ -0,0 +1,360 @@
+import math
+import random
+import time
+
+# Seconds allowed for exact counting before falling back to sampling
+TIME_BUDGET = 0.5
+
+# Components larger than this are always sampled rather than counted
+MAX_EXACT_CELLS = 200
+
+# Random consistent configurations drawn for each sampled component
+SAMPLES = 2000
+
+# Fewest samples drawn for a component even once the budget is spent
+MIN_SAMPLES = 50
+
+# Backtracking steps allowed while looking for one sample
+MAX_SAMPLE_STEPS = 10000
+
+
+class BudgetExceeded(Exception):
+    """Raised when exact counting runs out of time."""
+
+
+def components(constraints):
+    """
+    Splits constraints into independent groups that share no cells.
+
+    constraints is a list of (cells, count) pairs. Returns a list of
+    (cells, constraints) pairs, where cells is a list ordered so that cells
+    of the same constraint stay close together.
+    """
+    # Union-find over cells, joining all the cells of each constraint
+    parent = dict()
+
+    def find(cell):
+        while parent[cell] != cell:
+            parent[cell] = parent[parent[cell]]
+            cell = parent[cell]
+        return cell
+
+    for cells, _ in constraints:
+        for cell in cells:
+            parent.setdefault(cell, cell)
+        first = find(next(iter(cells)))
+        for cell in cells:
+            root = find(cell)
+            if root != first:
+                parent[root] = first
+
+    groups = dict()
+    for cells, count in constraints:
+        groups.setdefault(find(next(iter(cells))), []).append((cells, count))
+
+    result = []
+    for group in groups.values():
+        # Order cells breadth-first through shared constraints
+        by_cell = dict()
+        for constraint in group:
+            for cell in constraint[0]:
+                by_cell.setdefault(cell, []).append(constraint)
+        start = min(by_cell)
+        order = [start]
+        seen = {start}
+        for cell in order:
+            for cells, _ in by_cell[cell]:
+                for other in sorted(cells - seen):
+                    seen.add(other)
+                    order.append(other)
+        result.append((order, group))
+    return result
+
+
+def prepare(cells, constraints):
+    """
+    Numbers the constraints of a component and, for each cell index, lists
+    (constraint, cells of that constraint after this one) pairs.
+    """
+    index = {cell: i for i, cell in enumerate(cells)}
+    counts = []
+    by_cell = [[] for _ in cells]
+    spans = []
+    for c, (constraint_cells, count) in enumerate(constraints):
+        positions = sorted(index[cell] for cell in constraint_cells)
+        counts.append(count)
+        spans.append((positions[0], positions[-1]))
+        for p, i in enumerate(positions):
+            by_cell[i].append((c, len(positions) - p - 1))
+    return counts, by_cell, spans
+
+
+def count_component(cells, constraints, deadline):
+    """
+    Counts every mine configuration of a component consistent with its
+    constraints, by backtracking over cells with memoization.
+
+    Returns (ways, cell_ways): ways maps a number of mines k to how many
+    configurations have k mines, and cell_ways maps k to a list giving, for
+    each cell, how many of those configurations have a mine there.
+    """
+    n = len(cells)
+    remaining, by_cell, spans = prepare(cells, constraints)
+
+    # The constraints whose remaining count varies at each cell index:
+    # started before it and not finished before it
+    active = [
+        [c for c, (first, last) in enumerate(spans) if first < i <= last]
+        for i in range(n + 1)
+    ]
+    memo = dict()
+    calls = 0
+
+    def solve(i):
+        nonlocal calls
+        if i == n:
+            return {0: (1, ())}
+        key = (i, tuple(remaining[c] for c in active[i]))
+        if key in memo:
+            return memo[key]
+        calls += 1
+        if calls % 256 == 0 and time.perf_counter() > deadline:
+            raise BudgetExceeded()
+
+        result = dict()
+        for mine in (0, 1):
+            # Check every constraint on this cell can still be met
+            feasible = True
+            for c, left in by_cell[i]:
+                remaining[c] -= mine
+                if not 0 <= remaining[c] <= left:
+                    feasible = False
+            if feasible:
+                for k, (ways, counts) in solve(i + 1).items():
+                    k += mine
+                    counts = (ways * mine,) + counts
+                    if k in result:
+                        total, previous = result[k]
+                        result[k] = (total + ways, tuple(
+                            a + b for a, b in zip(previous, counts)))
+                    else:
+                        result[k] = (ways, counts)
+            for c, _ in by_cell[i]:
+                remaining[c] += mine
+
+        memo[key] = result
+        return result
+
+    result = solve(0)
+    return ({k: ways for k, (ways, _) in result.items()},
+            {k: list(counts) for k, (_, counts) in result.items()})
+
+
+def sample_component(cells, constraints, deadline, rng):
+    """
+    Estimates the same (ways, cell_ways) as count_component by drawing
+    random consistent configurations, for components too large to count.
+    """
+    n = len(cells)
+    counts, by_cell, _ = prepare(cells, constraints)
+    ways = dict()
+    cell_ways = dict()
+
+    for sample in range(SAMPLES):
+        if sample >= MIN_SAMPLES and time.perf_counter() > deadline:
+            break
+
+        # Depth-first search with random value order and backtracking
+        remaining = list(counts)
+        assignment = []
+        choices = []
+        steps = 0
+        while len(assignment) < n and steps < MAX_SAMPLE_STEPS:
+            steps += 1
+            i = len(assignment)
+            if len(choices) == i:
+                choices.append([0, 1] if rng.random() < 0.5 else [1, 0])
+            if not choices[i]:
+                # Both values failed here, so undo the previous cell
+                choices.pop()
+                if not assignment:
+                    break
+                mine = assignment.pop()
+                for c, _ in by_cell[len(assignment)]:
+                    remaining[c] += mine
+                continue
+            mine = choices[i].pop()
+            if all(0 <= remaining[c] - mine <= left for c, left in by_cell[i]):
+                for c, _ in by_cell[i]:
+                    remaining[c] -= mine
+                assignment.append(mine)
+        if len(assignment) < n:
+            continue
+
+        k = sum(assignment)
+        ways[k] = ways.get(k, 0) + 1
+        if k not in cell_ways:
+            cell_ways[k] = [0] * n
+        for i, mine in enumerate(assignment):
+            cell_ways[k][i] += mine
+    return ways, cell_ways
+
+
+def convolve(first, second):
+    """Multiplies two polynomials given as dictionaries of coefficients."""
+    result = dict()
+    for a, x in first.items():
+        for b, y in second.items():
+            result[a + b] = result.get(a + b, 0) + x * y
+    return result
+
+
+def frontier_probabilities(constraints, unknown_count, mines_left,
+                           time_budget=TIME_BUDGET, rng=random):
+    """
+    Returns (probabilities, floating): the probability that each cell in
+    constraints is a mine, and the probability shared by every other
+    unknown cell, or None if there are no such cells. Returns None if no
+    configuration is consistent with what is known.
+
+    constraints is a list of (cells, count) pairs over unknown cells, of
+    which there are unknown_count, and mines_left is the number of mines
+    among them. Every consistent placement of those mines is equally
+    likely, so configurations of the constrained cells are weighted by the
+    number of ways to place the rest of the mines in the unconstrained
+    cells. The unconstrained cells themselves are never listed, so the
+    time taken depends on the constraints, not on the size of the board.
+    """
+    deadline = time.perf_counter() + time_budget
+    groups = components([(set(cells), count)
+                         for cells, count in constraints if cells])
+    frontier = {cell for cells, _ in groups for cell in cells}
+    floating = unknown_count - len(frontier)
+
+    # Count each component exactly while time allows, then sample
+    results = []
+    for cells, group in groups:
+        result = None
+        if len(cells) <= MAX_EXACT_CELLS:
+            try:
+                result = count_component(cells, group, deadline)
+            except BudgetExceeded:
+                pass
+        if result is None:
+            result = sample_component(cells, group, deadline, rng)
+        ways, cell_ways = result
+        if not ways:
+            return None
+
+        # Scale counts down to floats so large components cannot overflow
+        scale = max(ways.values())
+        results.append((cells,
+                        {k: w / scale for k, w in ways.items()},
+                        {k: [w / scale for w in c] for k, c in cell_ways.items()}))
+
+    # Combined mine counts of all components but one, from prefix and
+    # suffix products of their polynomials
+    prefix = [{0: 1.0}]
+    for _, ways, _ in results:
+        prefix.append(convolve(prefix[-1], ways))
+    suffix = [{0: 1.0}]
+    for _, ways, _ in reversed(results):
+        suffix.append(convolve(suffix[-1], ways))
+    suffix.reverse()
+
+    # Relative number of ways to place r mines among the floating cells,
+    # only for the r left over by some combination of the components
+    def log_comb(r):
+        return (math.lgamma(floating + 1) - math.lgamma(r + 1)
+                - math.lgamma(floating - r + 1))
+    possible = [mines_left - s for s in prefix[-1]
+                if 0 <= mines_left - s <= floating]
+    if not possible:
+        return None
+    top = max(log_comb(r) for r in possible)
+    weight = {r: math.exp(log_comb(r) - top) for r in possible}
+
+    total = sum(w * weight.get(mines_left - s, 0.0)
+                for s, w in prefix[-1].items())
+    if total == 0:
+        return None
+
+    probabilities = dict()
+    for j, (cells, ways, cell_ways) in enumerate(results):
+        others = convolve(prefix[j], suffix[j + 1])
+        for k in ways:
+            w = sum(x * weight.get(mines_left - k - s, 0.0)
+                    for s, x in others.items())
+            for cell, mine_ways in zip(cells, cell_ways[k]):
+                probabilities[cell] = (probabilities.get(cell, 0.0)
+                                       + mine_ways * w / total)
+
+    # Floating cells share the expected number of mines not in components
+    if not floating:
+        return probabilities, None
+    expected = sum(w * weight.get(mines_left - s, 0.0) * (mines_left - s)
+                   for s, w in prefix[-1].items()) / total
+    return probabilities, expected / floating
+
+
+def mine_probabilities(constraints, unknown, mines_left,
+                       time_budget=TIME_BUDGET, rng=random):
+    """
+    Returns the probability that each unknown cell is a mine, or None if no
+    configuration is consistent with what is known. See
+    frontier_probabilities.
+    """
+    result = frontier_probabilities(constraints, len(unknown), mines_left,
+                                    time_budget, rng)
+    if result is None:
+        return None
+    probabilities, floating = result
+    if floating is not None:
+        for cell in unknown:
+            if cell not in probabilities:
+                probabilities[cell] = floating
+    return probabilities
+
+
+def safest_cell(constraints, unknown, mines_left,
+                time_budget=TIME_BUDGET, rng=random):
+    """
+    Returns the unknown cell least likely to be a mine, choosing randomly
+    among ties, or None if the probabilities cannot be computed.
+
+    unknown is a pool of the unknown cells with a choice(rng) method, such
+    as minesweeper.CellPool. When an unconstrained cell is chosen, it is
+    drawn from the pool until one outside the constraints comes up, so
+    only the constrained cells are ever listed or sorted.
+    """
+    result = frontier_probabilities(constraints, len(unknown), mines_left,
+                                    time_budget, rng)
+    if result is None:
+        return None
+    probabilities, floating = result
+    values = list(probabilities.values())
+    if floating is not None:
+        values.append(floating)
+    if not values:
+        return None
+    lowest = min(values)
+    tied = sorted(cell for cell, p in probabilities.items()
+                  if p <= lowest + 1e-12)
+    others = 0
+    if floating is not None and floating <= lowest + 1e-12:
+        others = len(unknown) - len(probabilities)
+
+    # Every tied cell is equally likely, constrained or not
+    pick = rng.randrange(len(tied) + others)
+    if pick < len(tied):
+        return tied[pick]
+
+    # Drawing takes a few tries unless most cells are constrained, and then
+    # listing the rest costs no more than the constraints already did
+    if 4 * others < len(unknown):
+        return rng.choice(sorted(cell for cell in unknown
+                                 if cell not in probabilities))
+    while True:
+        cell = unknown.choice(rng)
+        if cell not in probabilities:
+            return cell
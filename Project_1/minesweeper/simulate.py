@@ -0,0 +1,238 @@
+import argparse
+import logging
+import multiprocessing
+import os
+import random
+import time
+from array import array
+
+import snapshot
+from minesweeper import Minesweeper, MinesweeperAI
+
+
+def save_checkpoint(path, game, ai, stats, saved):
+    """
+    Saves a game in progress to path, with its statistics as metadata.
+    The knowledge base sizes are appended to path + ".knowledge" from
+    position saved on, rather than rewritten into every snapshot, so that
+    checkpoints stay the same size however long the game runs. Returns the
+    number of sizes now saved.
+    """
+    sizes = stats["knowledge"]
+    history = array("I", sizes[saved:])
+    with open(path + ".knowledge", "ab") as f:
+        f.truncate(saved * history.itemsize)
+        history.tofile(f)
+    metadata = dict(stats, knowledge=len(sizes))
+    snapshot.save(path, game, ai, metadata)
+    return len(sizes)
+
+
+def load_checkpoint(path):
+    """
+    Returns (game, ai, stats) from a checkpoint written by save_checkpoint.
+    Sizes appended after the snapshot was written, by a run stopped before
+    it finished saving, are ignored.
+    """
+    game, ai, stats = snapshot.load(path)
+    history = array("I")
+    with open(path + ".knowledge", "rb") as f:
+        history.fromfile(f, stats["knowledge"])
+    stats["knowledge"] = history.tolist()
+    return game, ai, stats
+
+
+def remove_checkpoint(path):
+    """Removes a checkpoint written by save_checkpoint, if there is one."""
+    for name in (path, path + ".knowledge"):
+        if os.path.exists(name):
+            os.remove(name)
+
+
+def play_game(height, width, mines, seed, max_moves=None, array=False,
+              engine="subset", checkpoint=None, every=1000):
+    """
+    Plays one game with MinesweeperAI without a display, with every random
+    choice made by the board and the AI determined by seed. If array is set,
+    the game uses the NumPy-backed board from board.py, and revealing a cell
+    with no nearby mines reveals its whole region, as in the usual game.
+    engine selects the AI's inference engine.
+
+    If checkpoint names a directory, the game is saved there every so many
+    moves, and resumed from its last snapshot if one exists. The snapshot
+    is removed once the game is won or lost.
+
+    Returns a dictionary with the seed, the result ("won", "lost", or
+    "stopped" after max_moves), the number of moves, the total time spent
+    in add_knowledge and in the whole game, and the knowledge base size
+    after each move.
+    """
+    random.seed(seed)
+    start = time.perf_counter()
+    path = None
+    if checkpoint is not None:
+        path = os.path.join(checkpoint, f"game-{seed}.snapshot")
+    if path is not None and os.path.exists(path):
+        game, ai, stats = load_checkpoint(path)
+        start -= stats["time"]
+    else:
+        if array:
+            from board import ArrayMinesweeper
+            game = ArrayMinesweeper(height=height, width=width, mines=mines,
+                                    seed=seed)
+        else:
+            game = Minesweeper(height=height, width=width, mines=mines)
+        ai = MinesweeperAI(height=height, width=width, mines=mines,
+                           engine=engine)
+        stats = {"seed": seed, "result": "stopped", "moves": 0,
+                 "inference": 0.0, "time": 0.0, "knowledge": []}
+    saved = len(stats["knowledge"])
+
+    while max_moves is None or stats["moves"] < max_moves:
+        move = ai.make_safe_move()
+        if move is None:
+            move = ai.make_random_move()
+        if move is None:
+            stats["result"] = "won"
+            break
+        if game.is_mine(move):
+            stats["result"] = "lost"
+            break
+
+        inference_start = time.perf_counter()
+        if array:
+            for cell, count in game.reveal(move):
+                ai.add_knowledge(cell, count)
+        else:
+            ai.add_knowledge(move, game.nearby_mines(move))
+        stats["inference"] += time.perf_counter() - inference_start
+        stats["moves"] += 1
+        stats["knowledge"].append(len(ai.knowledge))
+        if path is not None and stats["moves"] % every == 0:
+            stats["time"] = time.perf_counter() - start
+            saved = save_checkpoint(path, game, ai, stats, saved)
+
+    # Keeps a game stopped early, so that it can be played further later
+    stats["time"] = time.perf_counter() - start
+    if path is not None:
+        if stats["result"] == "stopped":
+            save_checkpoint(path, game, ai, stats, saved)
+        else:
+            remove_checkpoint(path)
+    return stats
+
+
+def play_game_args(args):
+    """Unpacks arguments for play_game, for use with a process pool."""
+    return play_game(*args)
+
+
+def simulate(height, width, mines, games, seed=0, workers=None, max_moves=None,
+             array=False, engine="subset", checkpoint=None, every=1000):
+    """
+    Plays games with seeds seed, seed + 1, ... across a pool of worker
+    processes. Returns the list of game statistics in seed order, which
+    does not depend on the number of workers.
+    """
+    tasks = [(height, width, mines, seed + game, max_moves, array, engine,
+              checkpoint, every)
+             for game in range(games)]
+    workers = workers or os.cpu_count()
+    if workers == 1:
+        results = list(map(play_game_args, tasks))
+    else:
+        with multiprocessing.Pool(workers) as pool:
+            results = list(pool.imap_unordered(
+                play_game_args, tasks, chunksize=max(1, games // (4 * workers))
+            ))
+    return sorted(results, key=lambda stats: stats["seed"])
+
+
+def report(results, height, width, mines, elapsed):
+    """Prints summary statistics for a list of game results."""
+    games = len(results)
+    wins = sum(stats["result"] == "won" for stats in results)
+    moves = sum(stats["moves"] for stats in results)
+    inference = sum(stats["inference"] for stats in results)
+    compute = sum(stats["time"] for stats in results)
+    sizes = [size for stats in results for size in stats["knowledge"]]
+
+    print(f"{games} games on {height}x{width} with {mines} mines")
+    print(f"  win rate:        {wins / max(games, 1):.1%} ({wins} won)")
+    print(f"  moves:           {moves} "
+          f"({moves / max(elapsed, 1e-9):,.0f}/s wall clock, "
+          f"{moves / max(compute, 1e-9):,.0f}/s per worker)")
+    print(f"  inference:       {inference / max(moves, 1) * 1000:.3f} ms "
+          f"per move")
+    if sizes:
+        print(f"  knowledge base:  {sum(sizes) / len(sizes):.1f} sentences "
+              f"on average, {max(sizes)} at most")
+
+    # Average knowledge base size by how far into the game each move was
+    bucket = max(1, (height * width - mines) // 10)
+    totals = dict()
+    for stats in results:
+        for move, size in enumerate(stats["knowledge"]):
+            total, count = totals.get(move // bucket, (0, 0))
+            totals[move // bucket] = (total + size, count + 1)
+    if totals:
+        print("  knowledge base size over time:")
+        for b in sorted(totals):
+            total, count = totals[b]
+            print(f"    moves {b * bucket:>7}-{(b + 1) * bucket - 1:<7} "
+                  f"{total / count:8.1f} sentences ({count} moves)")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Play many headless Minesweeper games with the AI.")
+    parser.add_argument("--height", type=int, default=16)
+    parser.add_argument("--width", type=int, default=16)
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--mines", type=int, default=None)
+    group.add_argument("--density", type=float, default=None,
+                       help="fraction of cells that are mines")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0,
+                        help="seed of the first game")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: one per CPU)")
+    parser.add_argument("--max-moves", type=int, default=None)
+    parser.add_argument("--array", action="store_true",
+                        help="use the NumPy board with flood-fill reveal")
+    parser.add_argument("--engine", choices=["subset", "linear"],
+                        default="subset", help="AI inference engine")
+    parser.add_argument("--checkpoint", default=None, metavar="DIRECTORY",
+                        help="save games here as they are played, and "
+                             "resume any found there")
+    parser.add_argument("--checkpoint-every", type=int, default=1000,
+                        metavar="MOVES")
+    parser.add_argument("--log-level", default="WARNING",
+                        help="level of AI log messages, e.g. INFO for "
+                             "every move")
+    args = parser.parse_args()
+    logging.basicConfig(level=args.log_level.upper(), format="%(message)s")
+    if args.checkpoint is not None:
+        if args.array:
+            parser.error("--checkpoint does not support --array boards")
+        os.makedirs(args.checkpoint, exist_ok=True)
+
+    if args.mines is not None:
+        mines = args.mines
+    elif args.density is not None:
+        mines = round(args.density * args.height * args.width)
+    else:
+        mines = 40
+
+    start = time.perf_counter()
+    results = simulate(args.height, args.width, mines, args.games,
+                       seed=args.seed, workers=args.workers,
+                       max_moves=args.max_moves, array=args.array,
+                       engine=args.engine, checkpoint=args.checkpoint,
+                       every=args.checkpoint_every)
+    report(results, args.height, args.width, mines,
+           time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
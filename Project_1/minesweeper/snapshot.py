@@ -0,0 +1,221 @@
+import gc
+import json
+import os
+import random
+import struct
+from array import array
+
+from minesweeper import CellPool, Minesweeper, MinesweeperAI, Sentence
+
+# Identifies snapshot files, and the version of their layout
+MAGIC = b"MSWP"
+VERSION = 1
+
+HEADER = struct.Struct("<4sB")
+LENGTH = struct.Struct("<Q")
+GAME = struct.Struct("<II")
+AI = struct.Struct("<IIiB")
+
+# Inference engines by their number in a snapshot
+ENGINES = ["subset", "linear"]
+
+# The positions of the set bits of every byte value
+BIT_POSITIONS = [tuple(bit for bit in range(8) if byte >> bit & 1)
+                 for byte in range(256)]
+
+
+def pack_cells(cells, width, size):
+    """
+    Returns a set of cells as a bitset of size bits, one per cell of the
+    board in row-major order.
+    """
+    bits = bytearray((size + 7) // 8)
+    for i, j in cells:
+        index = i * width + j
+        bits[index >> 3] |= 1 << (index & 7)
+    return bytes(bits)
+
+
+def unpack_cells(bits, width):
+    """
+    Returns the set of cells whose bits are set in a bitset.
+    """
+    cells = set()
+    for byte_index, byte in enumerate(bits):
+        if byte:
+            base = byte_index * 8
+            for bit in BIT_POSITIONS[byte]:
+                cells.add(divmod(base + bit, width))
+    return cells
+
+
+def pack_indices(cells, width):
+    """
+    Returns a sequence of cells as an array of their board indices, keeping
+    their order.
+    """
+    return array("I", [i * width + j for i, j in cells]).tobytes()
+
+
+def unpack_indices(data, width):
+    """
+    Returns the list of cells in an array of board indices.
+    """
+    indices = array("I")
+    indices.frombytes(data)
+    return [divmod(index, width) for index in indices]
+
+
+def join(sections):
+    """
+    Joins byte strings, each prefixed by its length.
+    """
+    return b"".join(LENGTH.pack(len(section)) + section
+                    for section in sections)
+
+
+def split(data):
+    """
+    Splits bytes produced by join back into the list of byte strings.
+    """
+    sections = []
+    position = 0
+    while position < len(data):
+        (length,) = LENGTH.unpack_from(data, position)
+        position += LENGTH.size
+        sections.append(bytes(data[position:position + length]))
+        position += length
+    return sections
+
+
+def pack_game(game):
+    """
+    Returns the state of a Minesweeper game as bytes: the board size, then
+    the mines and the mines found as bitsets.
+    """
+    size = game.height * game.width
+    return join([
+        GAME.pack(game.height, game.width),
+        pack_cells(game.mines, game.width, size),
+        pack_cells(game.mines_found, game.width, size),
+    ])
+
+
+def unpack_game(data):
+    """
+    Returns the Minesweeper game whose state pack_game returned.
+    """
+    header, mines, mines_found = split(data)
+    height, width = GAME.unpack(header)
+    game = Minesweeper(height=height, width=width, mines=0)
+    game.mines = unpack_cells(mines, width)
+    for i, j in game.mines:
+        game.board[i][j] = True
+    game.mines_found = unpack_cells(mines_found, width)
+    return game
+
+
+def pack_ai(ai):
+    """
+    Returns the state of a MinesweeperAI as bytes.
+
+    Moves made, mines and safes are bitsets. The knowledge base is three
+    arrays: the count of each sentence, the number of cells in each, and
+    all their cells. The two pools of candidate moves are kept as arrays in
+    their current order, so that a restored AI makes the same moves.
+    """
+    width = ai.width
+    size = ai.height * width
+    sentences = list(ai.knowledge.values())
+    return join([
+        AI.pack(ai.height, width,
+                -1 if ai.mine_count is None else ai.mine_count,
+                ENGINES.index(ai.engine)),
+        pack_cells(ai.moves_made, width, size),
+        pack_cells(ai.mines, width, size),
+        pack_cells(ai.safes, width, size),
+        array("i", [sentence.count for sentence in sentences]).tobytes(),
+        array("I", [len(sentence.cells) for sentence in sentences]).tobytes(),
+        pack_indices((cell for sentence in sentences
+                      for cell in sorted(sentence.cells)), width),
+        pack_indices(ai.safe_moves, width),
+        pack_indices(ai.available, width),
+    ])
+
+
+def unpack_ai(data):
+    """
+    Returns the MinesweeperAI whose state pack_ai returned. The knowledge
+    base is indexed again, and fed to the linear system if the AI uses one.
+    """
+    (header, moves_made, mines, safes,
+     counts, lengths, cells, safe_moves, available) = split(data)
+    height, width, mine_count, engine = AI.unpack(header)
+    ai = MinesweeperAI(height=height, width=width,
+                       mines=None if mine_count < 0 else mine_count,
+                       engine=ENGINES[engine])
+    ai.moves_made = unpack_cells(moves_made, width)
+    ai.mines = unpack_cells(mines, width)
+    ai.safes = unpack_cells(safes, width)
+    ai.safe_moves = CellPool(unpack_indices(safe_moves, width))
+    ai.available = CellPool(unpack_indices(available, width))
+
+    counts = array("i", counts)
+    lengths = array("I", lengths)
+    cells = unpack_indices(cells, width)
+    position = 0
+    for count, length in zip(counts, lengths):
+        sentence = Sentence(cells[position:position + length], count)
+        position += length
+        ai.add_sentence(sentence)
+        if ai.system is not None:
+            ai.system.add(sentence.cells, count)
+
+    # Everything that follows from the knowledge was already concluded
+    ai.pending.clear()
+    return ai
+
+
+def save(path, game, ai, metadata=None):
+    """
+    Writes a snapshot of a game, its AI, the state of the random module and
+    any JSON-serializable metadata to path. The file is replaced in one
+    step, so a crash while saving leaves the previous snapshot intact.
+    """
+    version, state, gauss = random.getstate()
+    data = HEADER.pack(MAGIC, VERSION) + join([
+        pack_game(game),
+        pack_ai(ai),
+        array("I", (version,) + state).tobytes(),
+        json.dumps({"gauss": gauss, "metadata": metadata}).encode(),
+    ])
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(data)
+    os.replace(temporary, path)
+
+
+def load(path):
+    """
+    Reads a snapshot written by save, restoring the state of the random
+    module, and returns (game, ai, metadata).
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path} is not a version {VERSION} snapshot")
+    game, ai, state, extra = split(memoryview(data)[HEADER.size:])
+    state = array("I", state)
+    extra = json.loads(extra)
+    random.setstate((state[0], tuple(state[1:]), extra["gauss"]))
+
+    # Rebuilding creates millions of objects on large boards, none of them
+    # garbage, so collection passes along the way would only waste time
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return unpack_game(game), unpack_ai(ai), extra["metadata"]
+    finally:
+        if enabled:
+            gc.enable()
@@ -0,0 +1,212 @@
+import multiprocessing
+import os
+import sys
+import time
+
+import numpy as np
+
+from crawler import scan_page
+from graph import Graph
+
+# Name of the cache file kept in a corpus directory
+CACHE_NAME = ".pagerank-cache.npz"
+
+# Version of the cache layout; caches of other versions are ignored
+VERSION = 1
+
+
+def pack_strings(strings):
+    """
+    Returns a list of strings as one array of UTF-8 bytes and an array of
+    offsets into it, which can be stored without pickling.
+    """
+    encoded = [string.encode("utf-8", "surrogateescape") for string in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(data) for data in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+def unpack_strings(data, offsets):
+    """
+    Returns the list of strings packed by pack_strings.
+    """
+    data = data.tobytes()
+    offsets = offsets.tolist()
+    return [data[start:end].decode("utf-8", "surrogateescape")
+            for start, end in zip(offsets, offsets[1:])]
+
+
+class LinkCache:
+    """
+    The links found in every page of a corpus, with each page's modification
+    time and size when it was scanned.
+
+    All page names and link targets, including targets outside the corpus,
+    are interned in self.names, since a page added later can turn a link
+    that went nowhere into one that counts. Row r describes the page
+    names[rows[r]], and its links are the names numbered
+    links[indptr[r]:indptr[r + 1]].
+    """
+
+    def __init__(self, names=(), rows=(), mtimes=(), sizes=(),
+                 indptr=(0,), links=()):
+        self.names = list(names)
+        self.rows = np.asarray(rows, dtype=np.int64)
+        self.mtimes = np.asarray(mtimes, dtype=np.int64)
+        self.sizes = np.asarray(sizes, dtype=np.int64)
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.links = np.asarray(links, dtype=np.int64)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Reads a cache saved by save, or returns an empty cache if there is
+        none or it cannot be read.
+        """
+        try:
+            with np.load(path) as data:
+                if int(data["version"]) != VERSION:
+                    return cls()
+                return cls(unpack_strings(data["names"], data["offsets"]),
+                           data["rows"], data["mtimes"], data["sizes"],
+                           data["indptr"], data["links"])
+        except (OSError, KeyError, ValueError):
+            return cls()
+
+    def save(self, path):
+        """
+        Writes the cache to path, dropping names no longer used, and
+        replacing any previous cache in one step.
+        """
+        used = np.zeros(len(self.names), dtype=bool)
+        used[self.rows] = True
+        used[self.links] = True
+        renumber = np.cumsum(used) - 1
+        names, offsets = pack_strings(
+            [self.names[i] for i in np.flatnonzero(used).tolist()])
+        temporary = f"{path}.tmp.npz"
+        np.savez(temporary, version=VERSION, names=names, offsets=offsets,
+                 rows=renumber[self.rows], mtimes=self.mtimes,
+                 sizes=self.sizes, indptr=self.indptr,
+                 links=renumber[self.links])
+        os.replace(temporary, path)
+
+    def update(self, directory, workers=1):
+        """
+        Brings the cache up to date with a directory of HTML pages: rows of
+        pages removed or changed since they were scanned are dropped, and
+        only new and changed pages are scanned. Returns a dictionary with
+        how many pages were reused, scanned, and removed.
+        """
+        files = dict()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.name.endswith(".html") and entry.is_file():
+                    stat = entry.stat()
+                    files[entry.name] = (stat.st_mtime_ns, stat.st_size)
+
+        # Keep the rows of pages whose modification time and size match
+        keep = np.zeros(len(self.rows), dtype=bool)
+        kept = set()
+        removed = 0
+        for r, (name, mtime, size) in enumerate(zip(
+                [self.names[i] for i in self.rows.tolist()],
+                self.mtimes.tolist(), self.sizes.tolist())):
+            if files.get(name) == (mtime, size):
+                keep[r] = True
+                kept.add(name)
+            elif name not in files:
+                removed += 1
+        changed = sorted(set(files) - kept)
+
+        lengths = np.diff(self.indptr)[keep]
+        links = [self.links[np.repeat(keep, np.diff(self.indptr))]]
+        rows = [self.rows[keep]]
+        mtimes = [self.mtimes[keep]]
+        sizes = [self.sizes[keep]]
+
+        if changed:
+            number = {name: i for i, name in enumerate(self.names)}
+
+            def intern(name):
+                if name not in number:
+                    number[name] = len(self.names)
+                    self.names.append(name)
+                return number[name]
+
+            tasks = [(directory, page) for page in changed]
+            if workers == 1:
+                results = map(scan_page, tasks)
+            else:
+                with multiprocessing.Pool(workers) as pool:
+                    results = pool.map(scan_page, tasks)
+            new_rows, new_lengths, new_links = [], [], []
+            for page, page_links, _ in results:
+                new_rows.append(intern(page))
+                new_lengths.append(len(page_links))
+                new_links.extend(intern(link) for link in sorted(page_links))
+            rows.append(np.array(new_rows, dtype=np.int64))
+            mtimes.append(np.array([files[page][0] for page in changed],
+                                   dtype=np.int64))
+            sizes.append(np.array([files[page][1] for page in changed],
+                                  dtype=np.int64))
+            lengths = np.concatenate([lengths, new_lengths])
+            links.append(np.array(new_links, dtype=np.int64))
+
+        self.rows = np.concatenate(rows)
+        self.mtimes = np.concatenate(mtimes)
+        self.sizes = np.concatenate(sizes)
+        self.indptr = np.zeros(len(self.rows) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=self.indptr[1:])
+        self.links = np.concatenate(links)
+        return {"reused": len(kept), "scanned": len(changed),
+                "removed": removed}
+
+    def graph(self):
+        """
+        Returns the Graph of the cached pages, keeping only links between
+        them.
+        """
+        names = [self.names[i] for i in self.rows.tolist()]
+        order = sorted(range(len(names)), key=names.__getitem__)
+        pages = [names[r] for r in order]
+        page_of = np.full(len(self.names), -1, dtype=np.int64)
+        page_of[self.rows[order]] = np.arange(len(pages))
+        sources = np.repeat(page_of[self.rows], np.diff(self.indptr))
+        targets = page_of[self.links]
+        inside = targets >= 0
+        return Graph.from_edges(pages, sources[inside], targets[inside])
+
+
+def crawl_cached(directory, workers=1, path=None):
+    """
+    Returns the Graph of a directory of HTML pages along with statistics
+    from LinkCache.update, scanning only pages that changed since the last
+    call. The cache is kept in the directory unless path is given; if it
+    cannot be written, the graph is still returned.
+    """
+    if path is None:
+        path = os.path.join(directory, CACHE_NAME)
+    cache = LinkCache.load(path)
+    stats = cache.update(directory, workers)
+    if stats["scanned"] or stats["removed"]:
+        try:
+            cache.save(path)
+        except OSError:
+            pass
+    return cache.graph(), stats
+
+
+def main():
+    if len(sys.argv) not in (2, 3):
+        sys.exit("Usage: python cache.py corpus [workers]")
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    start = time.perf_counter()
+    graph, stats = crawl_cached(sys.argv[1], workers)
+    print(f"{len(graph)} pages, {graph.edges} links in "
+          f"{time.perf_counter() - start:.3f}s: {stats['reused']} reused, "
+          f"{stats['scanned']} scanned, {stats['removed']} removed")
+
+
+if __name__ == "__main__":
+    main()
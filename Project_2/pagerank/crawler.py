@@ -0,0 +1,224 @@
+import multiprocessing
+import os
+import random
+import re
+import sys
+import time
+from array import array
+
+import numpy as np
+
+from graph import Graph
+
+# Bytes read from a file at a time
+CHUNK_SIZE = 1 << 16
+
+# Seconds between progress reports
+REPORT_INTERVAL = 1.0
+
+LINK = re.compile(rb"<a\s+(?:[^>]*?)href=\"([^\"]*)\"")
+OPENING = re.compile(rb"<a\s")
+
+
+def resume_point(buffer, start):
+    """
+    Returns where the next search for links must resume in buffer once
+    more data is appended: the first "<a" tag at or after start that could
+    still turn into a link, or the last two bytes, which could begin one.
+    """
+    for opening in OPENING.finditer(buffer, start):
+        position = opening.start()
+        end = buffer.find(b">", position)
+        if end == -1:
+            return position
+        href = buffer.find(b"href=\"", position, end)
+        if href != -1 and buffer.find(b"\"", href + 6) == -1:
+            return position
+    return max(start, len(buffer) - 2)
+
+
+def scan_links(path, chunk_size=CHUNK_SIZE):
+    """
+    Returns the set of links in an HTML file, found by the same pattern as
+    pagerank.crawl, and the number of bytes read. The file is read in
+    chunks, carrying over only the tail where a link may be cut off.
+    """
+    links = set()
+    size = 0
+    buffer = b""
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            size += len(chunk)
+            buffer += chunk
+            end = 0
+            for match in LINK.finditer(buffer):
+                links.add(match.group(1))
+                end = match.end()
+            buffer = buffer[resume_point(buffer, end):]
+    return {link.decode("utf-8", "surrogateescape") for link in links}, size
+
+
+def list_pages(directory):
+    """
+    Returns the sorted names of the HTML files in a directory.
+    """
+    with os.scandir(directory) as entries:
+        return sorted(entry.name for entry in entries
+                      if entry.name.endswith(".html") and entry.is_file())
+
+
+def scan_page(args):
+    """Scans one page for a worker, returning its name with the result."""
+    directory, page = args
+    links, size = scan_links(os.path.join(directory, page))
+    return page, links, size
+
+
+class Progress:
+    """
+    Reports files and bytes processed per second on standard error.
+    """
+
+    def __init__(self, total, enabled=True):
+        self.total = total
+        self.enabled = enabled
+        self.files = 0
+        self.bytes = 0
+        self.start = time.perf_counter()
+        self.last = self.start
+
+    def update(self, size):
+        self.files += 1
+        self.bytes += size
+        now = time.perf_counter()
+        if self.enabled and now - self.last >= REPORT_INTERVAL:
+            self.last = now
+            self.report(now, end="\r")
+
+    def report(self, now=None, end="\n"):
+        elapsed = max((now or time.perf_counter()) - self.start, 1e-9)
+        print(f"{self.files}/{self.total} files, "
+              f"{self.bytes / 1e6:.1f} MB, "
+              f"{self.files / elapsed:,.0f} files/s, "
+              f"{self.bytes / 1e6 / elapsed:.1f} MB/s",
+              end=end, file=sys.stderr)
+
+
+def crawl_edges(directory, output, workers=None, progress=False):
+    """
+    Crawls a directory of HTML pages with a pool of worker processes, and
+    writes its link graph to disk as it goes: the page names, one per line,
+    to output + ".pages", and every link between two pages of the corpus
+    as a pair of 32-bit page numbers to output. Returns the number of pages
+    and the number of links written.
+    """
+    pages = list_pages(directory)
+    index = {page: i for i, page in enumerate(pages)}
+    with open(output + ".pages", "w", encoding="utf-8",
+              errors="surrogateescape") as f:
+        f.writelines(page + "\n" for page in pages)
+
+    tasks = [(directory, page) for page in pages]
+    workers = workers or os.cpu_count()
+    tracker = Progress(len(pages), enabled=progress)
+    links = 0
+    with open(output, "wb") as f:
+        if workers == 1:
+            pool = None
+            results = map(scan_page, tasks)
+        else:
+            pool = multiprocessing.Pool(workers)
+            results = pool.imap_unordered(
+                scan_page, tasks,
+                chunksize=max(1, min(256, len(tasks) // (8 * workers))))
+        try:
+            for page, targets, size in results:
+                source = index[page]
+                edges = array("i")
+                for target in targets:
+                    target = index.get(target)
+                    if target is not None and target != source:
+                        edges.append(source)
+                        edges.append(target)
+                edges.tofile(f)
+                links += len(edges) // 2
+                tracker.update(size)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+    if progress:
+        tracker.report()
+    return len(pages), links
+
+
+def load_edges(output):
+    """
+    Returns the Graph of a link graph written by crawl_edges.
+    """
+    with open(output + ".pages", encoding="utf-8",
+              errors="surrogateescape") as f:
+        pages = f.read().splitlines()
+    edges = np.fromfile(output, dtype=np.int32).reshape(-1, 2)
+    return Graph.from_edges(pages, edges[:, 0], edges[:, 1])
+
+
+def crawl_graph(directory, workers=1):
+    """
+    Returns the Graph of a directory of HTML pages, crawled in memory.
+    """
+    pages = list_pages(directory)
+    index = {page: i for i, page in enumerate(pages)}
+    sources = array("i")
+    targets = array("i")
+    tasks = [(directory, page) for page in pages]
+    if workers == 1:
+        results = map(scan_page, tasks)
+    else:
+        with multiprocessing.Pool(workers) as pool:
+            results = pool.map(scan_page, tasks)
+    for page, links, _ in results:
+        for link in links:
+            if link in index:
+                sources.append(index[page])
+                targets.append(index[link])
+    return Graph.from_edges(pages, sources, targets)
+
+
+def write_corpus(directory, pages, links=10, padding=2000, seed=0):
+    """
+    Writes a random corpus of HTML pages for benchmarks, each with about
+    links links among text of about padding bytes, and some links outside
+    the corpus.
+    """
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    for i in range(pages):
+        parts = ["<html><body>\n"]
+        for _ in range(rng.randint(0, 2 * links)):
+            target = int(pages * rng.random() ** 2)
+            if rng.random() < 0.1:
+                target = f"https://example.com/{target}"
+            else:
+                target = f"{target}.html"
+            parts.append("x" * rng.randint(0, 2 * padding // (links + 1)))
+            parts.append(f'<a class="link" href="{target}">{target}</a>\n')
+        parts.append("</body></html>\n")
+        with open(os.path.join(directory, f"{i}.html"), "w") as f:
+            f.write("".join(parts))
+
+
+def main():
+    if len(sys.argv) not in (3, 4):
+        sys.exit("Usage: python crawler.py corpus output [workers]")
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else None
+    pages, links = crawl_edges(sys.argv[1], sys.argv[2], workers=workers,
+                               progress=True)
+    print(f"{pages} pages, {links} links written to {sys.argv[2]}")
+
+
+if __name__ == "__main__":
+    main()
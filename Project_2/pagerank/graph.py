@@ -0,0 +1,134 @@
+import numpy as np
+
+
+class Graph:
+    """
+    Link graph of a corpus in compressed sparse row (CSR) form.
+
+    Pages are numbered 0 to N - 1 in the order of self.pages. The links of
+    page i are the page numbers indices[indptr[i]:indptr[i + 1]], so the
+    whole graph takes two arrays instead of a set per page.
+    """
+
+    def __init__(self, pages, indptr, indices):
+        self.pages = pages if isinstance(pages, range) else list(pages)
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self._index = None
+
+    @property
+    def index(self):
+        """Maps each page to its number, built on first use."""
+        if self._index is None:
+            self._index = {page: i for i, page in enumerate(self.pages)}
+        return self._index
+
+    @classmethod
+    def from_corpus(cls, corpus):
+        """
+        Builds the graph of a corpus as returned by crawl, a dictionary
+        mapping each page to the set of pages it links to.
+        """
+        pages = sorted(corpus)
+        index = {page: i for i, page in enumerate(pages)}
+        indptr = np.zeros(len(pages) + 1, dtype=np.int64)
+        indices = []
+        for i, page in enumerate(pages):
+            links = sorted(index[link] for link in corpus[page])
+            indices.extend(links)
+            indptr[i + 1] = indptr[i] + len(links)
+        return cls(pages, indptr, indices)
+
+    @classmethod
+    def from_edges(cls, pages, sources, targets):
+        """
+        Builds a graph from parallel arrays of link sources and targets,
+        given as page numbers, dropping duplicate links and self-links.
+        """
+        n = len(pages)
+        sources = np.asarray(sources, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.int64)
+        keep = sources != targets
+        keys = np.sort(sources[keep] * n + targets[keep])
+        if len(keys):
+            distinct = np.empty(len(keys), dtype=bool)
+            distinct[0] = True
+            np.not_equal(keys[1:], keys[:-1], out=distinct[1:])
+            keys = keys[distinct]
+        return cls.from_keys(pages, keys)
+
+    @classmethod
+    def from_keys(cls, pages, keys):
+        """
+        Builds a graph from the sorted, distinct keys source * N + target
+        of its links, where N is the number of pages.
+        """
+        n = len(pages)
+        sources, targets = np.divmod(keys, n)
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=n), out=indptr[1:])
+        return cls(pages, indptr, targets)
+
+    def keys(self):
+        """
+        Returns the sorted keys source * N + target of every link.
+        """
+        return self.sources().astype(np.int64) * len(self) + self.indices
+
+    def __len__(self):
+        return len(self.pages)
+
+    @property
+    def edges(self):
+        return len(self.indices)
+
+    @property
+    def out_degree(self):
+        return np.diff(self.indptr)
+
+    @property
+    def dangling(self):
+        """Boolean mask of the pages with no links."""
+        return self.indptr[1:] == self.indptr[:-1]
+
+    def sources(self):
+        """
+        Returns the source page of every link, parallel to self.indices.
+        """
+        return np.repeat(np.arange(len(self), dtype=np.int32),
+                         self.out_degree)
+
+    def links(self, page):
+        """
+        Returns the set of pages that a page links to.
+        """
+        i = self.index[page]
+        return {self.pages[j]
+                for j in self.indices[self.indptr[i]:self.indptr[i + 1]]}
+
+    def to_corpus(self):
+        """
+        Returns the graph as a dictionary like the one crawl returns.
+        """
+        return {page: self.links(page) for page in self.pages}
+
+    def rank_dict(self, ranks):
+        """
+        Returns a vector of ranks as a dictionary keyed by page.
+        """
+        return dict(zip(self.pages, ranks.tolist()))
+
+
+def random_graph(n, average_degree=10, dangling=0.05, seed=None):
+    """
+    Returns a random graph with n pages, for benchmarks. Link targets
+    follow a power law, as on the web, and a fraction of the pages have
+    no links at all.
+    """
+    rng = np.random.default_rng(seed)
+    degree = rng.poisson(average_degree, n)
+    degree[rng.random(n) < dangling] = 0
+    sources = np.repeat(np.arange(n), degree)
+    targets = (n * rng.random(len(sources)) ** 2).astype(np.int64)
+    pages = [f"{i}.html" for i in range(n)]
+    return Graph.from_edges(pages, sources, targets)
@@ -0,0 +1,259 @@
+import sys
+import time
+
+import numpy as np
+
+from graph import Graph, random_graph
+from solvers import TOLERANCE, MAX_ITERATIONS, power_iteration
+
+# Residual left unpushed at any one page by push_update, as a fraction of
+# the average rank
+PUSH_THRESHOLD = 1e-4
+
+
+class GraphDelta:
+    """
+    Changes to a link graph: pages added and removed, and links added and
+    removed, given as (source, target) pairs of page names. Removing a page
+    also removes every link to and from it.
+    """
+
+    def __init__(self, added_pages=(), removed_pages=(), added_links=(),
+                 removed_links=()):
+        self.added_pages = list(added_pages)
+        self.removed_pages = list(removed_pages)
+        self.added_links = list(added_links)
+        self.removed_links = list(removed_links)
+
+
+def apply_delta(graph, delta):
+    """
+    Returns (graph, renumber, changed): the graph with delta applied, an
+    array mapping each old page number to its new number or -1 if removed,
+    and the new numbers of the pages whose links changed.
+
+    Links added to or from a page removed by the same delta are dropped
+    with it. Raises ValueError if the delta names a page that is neither in
+    the graph nor added by it.
+
+    Remaining pages keep their order and new pages come last, so page
+    numbers only shift down past removed pages and the sorted link keys stay
+    sorted. The new graph is spliced together in time linear in the number
+    of links, without sorting them again.
+    """
+    n = len(graph)
+    added = [page for page in dict.fromkeys(delta.added_pages)
+             if page not in graph.index]
+    known = set(added)
+    for page in delta.removed_pages:
+        if page not in graph.index:
+            raise ValueError(f"Unknown page: {page}")
+    for source, target in delta.removed_links + delta.added_links:
+        for page in (source, target):
+            if page not in graph.index and page not in known:
+                raise ValueError(f"Unknown page: {page}")
+    removed = np.zeros(n, dtype=bool)
+    removed[[graph.index[page] for page in delta.removed_pages]] = True
+    kept = np.flatnonzero(~removed)
+    pages = [graph.pages[i] for i in kept.tolist()] + added
+    renumber = np.full(n, -1, dtype=np.int64)
+    renumber[kept] = np.arange(len(kept))
+    m = len(pages)
+
+    # New numbers of the pages named in the delta, skipping removed ones
+    index = {page: len(kept) + i for i, page in enumerate(added)}
+    for source, target in delta.removed_links + delta.added_links:
+        for page in (source, target):
+            if page not in index and page in graph.index:
+                number = int(renumber[graph.index[page]])
+                if number >= 0:
+                    index[page] = number
+
+    # Old links between remaining pages, renumbered, minus removed links
+    sources = graph.sources()
+    targets = graph.indices
+    alive = ~(removed[sources] | removed[targets])
+    changed = [sources[removed[targets] & ~removed[sources]]]
+    keys = renumber[sources[alive]] * m + renumber[targets[alive]]
+    drop = np.array(sorted(index[s] * m + index[t]
+                           for s, t in delta.removed_links
+                           if s in index and t in index), dtype=np.int64)
+    if len(drop):
+        positions = np.searchsorted(keys, drop)
+        found = positions < len(keys)
+        found[found] = keys[positions[found]] == drop[found]
+        keys = np.delete(keys, positions[found])
+
+    add = np.array(sorted({index[s] * m + index[t]
+                           for s, t in delta.added_links
+                           if s != t and s in index and t in index}),
+                   dtype=np.int64)
+    if len(add):
+        positions = np.searchsorted(keys, add)
+        new = (positions == len(keys)) | (
+            keys[np.minimum(positions, len(keys) - 1)] != add)
+        keys = np.insert(keys, positions[new], add[new])
+
+    changed = np.unique(np.concatenate(
+        [renumber[np.concatenate(changed)], drop // m, add // m]
+    ).astype(np.int64))
+    return Graph.from_keys(pages, keys), renumber, changed
+
+
+def carry_over(ranks, renumber, n):
+    """
+    Returns the old ranks of remaining pages in their new positions, with
+    zero for new pages.
+    """
+    carried = np.zeros(n)
+    kept = renumber >= 0
+    carried[renumber[kept]] = ranks[kept]
+    return carried
+
+
+def warm_start(graph, ranks, renumber, damping_factor,
+               tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS):
+    """
+    Recomputes PageRank after a change by power iteration starting from
+    the previous ranks, with new pages given the average rank.
+    """
+    n = len(graph)
+    initial = carry_over(ranks, renumber, n)
+    initial[initial == 0] = 1 / n
+    initial /= initial.sum()
+    return power_iteration(graph, damping_factor, tolerance,
+                           max_iterations, initial=initial)
+
+
+def push_update(old_graph, ranks, graph, renumber, changed, damping_factor,
+                threshold=PUSH_THRESHOLD):
+    """
+    Updates PageRank after a change by pushing corrections out from the
+    pages whose links changed, touching only the region they reach.
+
+    If ranks solved the old graph exactly, the carried-over ranks fail the
+    new equations only by what the changed pages used to send and now send
+    along their links, plus terms equal at every page: the teleport share,
+    which changes with N, and the rank spread by pages with no links. New
+    pages start from the old value of those uniform terms. A
+    uniform error only rescales the solution, so it is fixed by
+    normalizing at the end, and the rest is pushed through the graph until
+    no page holds more than threshold times the average rank.
+    """
+    n = len(graph)
+    x = carry_over(ranks, renumber, n)
+    residual = np.zeros(n)
+
+    # New pages start from the part of the old equations equal at every
+    # page, so that their error is the same uniform term as everyone else's
+    dangling = ranks[old_graph.dangling].sum()
+    x[renumber.max(initial=-1) + 1:] = (
+        (1 - damping_factor) + damping_factor * dangling) / len(old_graph)
+
+    # Take back what changed and removed pages used to send...
+    old_changed = np.concatenate([
+        np.flatnonzero(np.isin(renumber, changed)),
+        np.flatnonzero(renumber < 0),
+    ])
+    old_degree = old_graph.out_degree
+    for page in old_changed.tolist():
+        degree = old_degree[page]
+        if degree:
+            targets = renumber[old_graph.indices[
+                old_graph.indptr[page]:old_graph.indptr[page + 1]]]
+            targets = targets[targets >= 0]
+            np.add.at(residual, targets,
+                      -damping_factor * ranks[page] / degree)
+
+    # ...and send what they send now
+    new_degree = graph.out_degree
+    for page in changed.tolist():
+        degree = new_degree[page]
+        if degree:
+            targets = graph.indices[graph.indptr[page]:graph.indptr[page + 1]]
+            residual[targets] += damping_factor * x[page] / degree
+
+    # Push every page over the threshold at once, round after round
+    threshold /= n
+    frontier = np.flatnonzero(np.abs(residual) > threshold)
+    while len(frontier):
+        values = residual[frontier]
+        residual[frontier] = 0
+        x[frontier] += values
+
+        linked = new_degree[frontier] > 0
+        frontier, values = frontier[linked], values[linked]
+        lengths = new_degree[frontier]
+        if not len(frontier):
+            break
+        offsets = np.cumsum(lengths) - lengths
+        positions = (np.repeat(graph.indptr[frontier] - offsets, lengths)
+                     + np.arange(lengths.sum()))
+        touched, inverse = np.unique(graph.indices[positions],
+                                     return_inverse=True)
+        residual[touched] += np.bincount(
+            inverse, weights=np.repeat(damping_factor * values / lengths,
+                                       lengths))
+        frontier = touched[np.abs(residual[touched]) > threshold]
+    return x / x.sum()
+
+
+def random_delta(graph, pages=10, links=100, seed=None):
+    """
+    Returns a random GraphDelta for benchmarks: pages added and removed,
+    and links added and removed among the pages.
+    """
+    rng = np.random.default_rng(seed)
+    n = len(graph)
+    names = graph.pages
+    added = [f"new{i}.html" for i in range(pages)]
+    removed = [names[i] for i in rng.choice(n, pages, replace=False)]
+    gone = set(removed)
+    everyone = [page for page in names if page not in gone]
+    added_links = [(everyone[rng.integers(len(everyone))], added[i % pages])
+                   for i in range(links // 2)]
+    added_links += [(added[i % pages], everyone[rng.integers(len(everyone))])
+                    for i in range(links // 2)]
+    sources = graph.sources()
+    chosen = rng.choice(graph.edges, links, replace=False)
+    removed_links = [(names[sources[e]], names[graph.indices[e]])
+                     for e in chosen.tolist()]
+    return GraphDelta(added, removed, added_links, removed_links)
+
+
+def main():
+    if len(sys.argv) > 4:
+        sys.exit("Usage: python incremental.py [pages] [changed pages] "
+                 "[changed links]")
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    pages = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    links = int(sys.argv[3]) if len(sys.argv) > 3 else 100
+    damping = 0.85
+
+    old_graph = random_graph(n, seed=0)
+    ranks = power_iteration(old_graph, damping, tolerance=1e-12)
+    delta = random_delta(old_graph, pages, links, seed=1)
+
+    start = time.perf_counter()
+    graph, renumber, changed = apply_delta(old_graph, delta)
+    print(f"{n} pages, {old_graph.edges} links; {pages} pages added and "
+          f"removed, {links} links added and removed")
+    print(f"  apply delta: {time.perf_counter() - start:8.3f}s")
+    exact = power_iteration(graph, damping, tolerance=1e-12)
+
+    methods = {
+        "cold start": lambda: power_iteration(graph, damping),
+        "warm start": lambda: warm_start(graph, ranks, renumber, damping),
+        "push": lambda: push_update(old_graph, ranks, graph, renumber,
+                                    changed, damping),
+    }
+    for name, method in methods.items():
+        start = time.perf_counter()
+        result = method()
+        elapsed = time.perf_counter() - start
+        print(f"  {name + ':':<12} {elapsed:8.3f}s, "
+              f"L1 error {np.abs(result - exact).sum():.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,379 @@
+import mmap
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from solvers import TOLERANCE, MAX_ITERATIONS
+
+# Links or pages read from disk at a time
+BLOCK_SIZE = 1 << 20
+
+# Links sorted in memory at a time while preparing a link file
+BUCKET_LINKS = 1 << 24
+
+# Bytes of one link, a pair of 32-bit page numbers as crawl_edges writes
+LINK_BYTES = 8
+
+# Bytes of the number of links of one page in a ".degree" file
+DEGREE_BYTES = 4
+
+
+class MappedFile:
+    """
+    A read-only memory map of a file, viewed as arrays one range at a
+    time. Once a range is done with, release hands its pages back to the
+    operating system, so that streaming through a file larger than RAM
+    keeps only about one range resident.
+
+    The map cannot be closed while views of it exist, so views are only
+    used within the functions that take them.
+    """
+
+    def __init__(self, path):
+        self.size = os.path.getsize(path)
+        self.map = None
+        if self.size:
+            with open(path, "rb") as f:
+                self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            if hasattr(self.map, "madvise"):
+                self.map.madvise(mmap.MADV_SEQUENTIAL)
+
+    def view(self, dtype, start, count):
+        """
+        Returns count items of dtype from item start on, which are only
+        read from the file when used.
+        """
+        dtype = np.dtype(dtype)
+        return np.frombuffer(self.map, dtype=dtype, count=count,
+                             offset=start * dtype.itemsize)
+
+    def release(self, start, end):
+        """
+        Drops the pages holding bytes start to end from memory; they are
+        read again if needed.
+        """
+        if self.map is not None and hasattr(mmap, "MADV_DONTNEED"):
+            start -= start % mmap.PAGESIZE
+            self.map.madvise(mmap.MADV_DONTNEED, start, end - start)
+
+    def close(self):
+        if self.map is not None:
+            self.map.close()
+
+
+def count_pages(output):
+    """
+    Returns the number of page names in output + ".pages".
+    """
+    count = 0
+    with open(output + ".pages", "rb") as f:
+        while chunk := f.read(BLOCK_SIZE):
+            count += chunk.count(b"\n")
+    return count
+
+
+def count_block(links_file, degree, start, count):
+    """Counts the links start to start + count in their sources' degrees."""
+    links = links_file.view(np.int32, 2 * start, 2 * count)
+    np.add.at(degree, links[0::2], 1)
+    links_file.release(start * LINK_BYTES, (start + count) * LINK_BYTES)
+
+
+def split_block(links_file, bounds, files, start, count):
+    """Appends each of the links start to start + count to its bucket file."""
+    links = links_file.view(np.int32, 2 * start, 2 * count).reshape(-1, 2)
+    buckets = np.searchsorted(bounds, links[:, 0], side="right") - 1
+    order = np.argsort(buckets, kind="stable")
+    ends = np.cumsum(np.bincount(buckets, minlength=len(files)))
+    for f, first, last in zip(files, ends - np.diff(ends, prepend=0), ends):
+        if last > first:
+            links[order[first:last]].tofile(f)
+    links_file.release(start * LINK_BYTES, (start + count) * LINK_BYTES)
+
+
+def bucket_bounds(degree, bucket_links):
+    """
+    Splits the pages into ranges of consecutive pages with about
+    bucket_links links in all, given the links of each page, and returns
+    the first page of each range followed by the number of pages.
+    """
+    bounds = {0, len(degree)}
+    total = 0
+    for start in range(0, len(degree), BLOCK_SIZE):
+        counts = total + np.cumsum(degree[start:start + BLOCK_SIZE],
+                                   dtype=np.int64)
+        marks = np.arange((total // bucket_links + 1) * bucket_links,
+                          counts[-1] + 1, bucket_links)
+        bounds.update((start + 1 + np.searchsorted(counts, marks)).tolist())
+        total = int(counts[-1])
+    return sorted(bounds)
+
+
+def sort_links(edges, output, bucket_links=BUCKET_LINKS):
+    """
+    Prepares a link file written by crawler.crawl_edges for stream_pagerank,
+    without holding more than about bucket_links links in memory. Writes
+    the links sorted by source, without duplicates or self-links, to
+    output, the number of links of each page as 32-bit integers to
+    output + ".degree", and the page names to output + ".pages". Returns
+    the number of pages and of links written.
+
+    This is a bucket sort on disk: the links are counted by source, split
+    into bucket files of consecutive sources, and each bucket is sorted in
+    memory and appended to output.
+    """
+    n = count_pages(edges)
+    if not n:
+        raise ValueError("Link file has no pages")
+    if os.path.abspath(edges) == os.path.abspath(output):
+        raise ValueError("Output must not replace the link file")
+    shutil.copyfile(edges + ".pages", output + ".pages")
+    degree = np.memmap(output + ".degree", dtype=np.int32, mode="w+",
+                       shape=(n,))
+    links_file = MappedFile(edges)
+    links = links_file.size // LINK_BYTES
+    written = 0
+    try:
+        for start in range(0, links, BLOCK_SIZE):
+            count_block(links_file, degree, start,
+                        min(BLOCK_SIZE, links - start))
+        bounds = bucket_bounds(degree, bucket_links)
+        starts = np.array(bounds)
+
+        with tempfile.TemporaryDirectory(
+                dir=os.path.dirname(os.path.abspath(output))) as directory:
+            paths = [os.path.join(directory, f"{i}.links")
+                     for i in range(len(bounds) - 1)]
+            files = [open(path, "wb") for path in paths]
+            try:
+                for start in range(0, links, BLOCK_SIZE):
+                    split_block(links_file, starts, files, start,
+                                min(BLOCK_SIZE, links - start))
+            finally:
+                for f in files:
+                    f.close()
+
+            with open(output, "wb") as f:
+                for path, first, last in zip(paths, bounds, bounds[1:]):
+                    pairs = np.fromfile(path, dtype=np.int32).reshape(-1, 2)
+                    os.remove(path)
+                    keep = pairs[:, 0] != pairs[:, 1]
+                    keys = np.sort(pairs[keep, 0].astype(np.int64) * n
+                                   + pairs[keep, 1])
+                    if len(keys):
+                        distinct = np.empty(len(keys), dtype=bool)
+                        distinct[0] = True
+                        np.not_equal(keys[1:], keys[:-1], out=distinct[1:])
+                        keys = keys[distinct]
+                    sources, targets = np.divmod(keys, n)
+                    degree[first:last] = np.bincount(sources - first,
+                                                     minlength=last - first)
+                    np.column_stack((sources, targets)).astype(
+                        np.int32).tofile(f)
+                    written += len(keys)
+    finally:
+        links_file.close()
+        degree.flush()
+    return n, written
+
+
+def dangling_block(degree_file, ranks, start, count):
+    """Returns the rank of the pages start to start + count with no links."""
+    degree = degree_file.view(np.int32, start, count)
+    total = float(ranks[start:start + count][degree == 0].sum())
+    degree_file.release(start * DEGREE_BYTES, (start + count) * DEGREE_BYTES)
+    return total
+
+
+def push_block(links_file, degree_file, ranks, updated, damping_factor,
+               start, count):
+    """Adds what flows along the links start to start + count to updated."""
+    links = links_file.view(np.int32, 2 * start, 2 * count).reshape(-1, 2)
+    sources = links[:, 0]
+    first, last = int(sources[0]), int(sources[-1]) + 1
+
+    # Sorted sources make the degrees of a block one short run of the file
+    degree = degree_file.view(np.int32, first, last - first)
+    flow = ranks[sources] * (damping_factor / degree[sources - first])
+
+    # np.add.at takes a much slower path for values of another type than
+    # the array, and is faster with native integer indices
+    np.add.at(updated, links[:, 1].astype(np.intp),
+              flow.astype(updated.dtype, copy=False))
+    links_file.release(start * LINK_BYTES, (start + count) * LINK_BYTES)
+    degree_file.release(first * DEGREE_BYTES, last * DEGREE_BYTES)
+
+
+def storage_reads():
+    """
+    Returns how many bytes this process has read from storage, not counting
+    reads served from the page cache, or None where that is not known.
+    """
+    try:
+        with open("/proc/self/io") as f:
+            for line in f:
+                if line.startswith("read_bytes:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def peak_memory():
+    """
+    Returns the peak resident memory of this process in bytes, or None
+    where that is not known.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def stream_pagerank(output, damping_factor, tolerance=TOLERANCE,
+                    max_iterations=MAX_ITERATIONS, dtype=np.float64,
+                    trace=None):
+    """
+    Returns the vector of PageRank values of a link file prepared by
+    sort_links, by power iteration like solvers.jacobi, without loading
+    the links: every iteration streams them through a memory map in
+    blocks of BLOCK_SIZE, and only the old and new rank vectors, of dtype,
+    are held in memory.
+
+    If trace is a list, a dictionary is appended to it for each iteration
+    with its residual, its time in seconds, the bytes it streamed, and the
+    bytes it read from storage rather than the page cache, or None.
+    """
+    links_file = MappedFile(output)
+    degree_file = MappedFile(output + ".degree")
+    n = degree_file.size // DEGREE_BYTES
+    links = links_file.size // LINK_BYTES
+    ranks = np.full(n, 1 / n, dtype=dtype)
+    updated = np.empty(n, dtype=dtype)
+    try:
+        for _ in range(max_iterations):
+            start_time = time.perf_counter()
+            reads = storage_reads()
+
+            # Pages with no links spread their rank over every page
+            dangling = sum(
+                dangling_block(degree_file, ranks, start,
+                               min(BLOCK_SIZE, n - start))
+                for start in range(0, n, BLOCK_SIZE))
+            updated.fill(((1 - damping_factor)
+                          + damping_factor * dangling) / n)
+            for start in range(0, links, BLOCK_SIZE):
+                push_block(links_file, degree_file, ranks, updated,
+                           damping_factor, start,
+                           min(BLOCK_SIZE, links - start))
+
+            change = sum(
+                float(np.abs(updated[start:start + BLOCK_SIZE]
+                             - ranks[start:start + BLOCK_SIZE]).sum())
+                for start in range(0, n, BLOCK_SIZE))
+            ranks, updated = updated, ranks
+            if trace is not None:
+                after = storage_reads()
+                trace.append({
+                    "residual": change,
+                    "seconds": time.perf_counter() - start_time,
+                    "streamed": links_file.size + degree_file.size,
+                    "read": None if reads is None else after - reads,
+                })
+            if change < tolerance:
+                break
+    finally:
+        links_file.close()
+        degree_file.close()
+    return ranks
+
+
+def write_random_links(output, n, average_degree=10, dangling=0.05,
+                       seed=None):
+    """
+    Writes a random link graph like graph.random_graph in the format of
+    crawler.crawl_edges, a block of pages at a time, for benchmarks.
+    """
+    rng = np.random.default_rng(seed)
+    with open(output + ".pages", "w") as f:
+        for start in range(0, n, BLOCK_SIZE):
+            f.writelines(f"{i}.html\n"
+                         for i in range(start, min(n, start + BLOCK_SIZE)))
+    with open(output, "wb") as f:
+        for start in range(0, n, BLOCK_SIZE):
+            end = min(n, start + BLOCK_SIZE)
+            degree = rng.poisson(average_degree, end - start)
+            degree[rng.random(end - start) < dangling] = 0
+            sources = np.repeat(np.arange(start, end), degree)
+            targets = (n * rng.random(len(sources)) ** 2).astype(np.int64)
+            np.column_stack((sources, targets)).astype(np.int32).tofile(f)
+
+
+def top_pages(output, ranks, count=10):
+    """
+    Returns the names and ranks of the count highest-ranked pages, reading
+    the names from output + ".pages" one line at a time.
+    """
+    count = min(count, len(ranks))
+    best = np.argpartition(ranks, len(ranks) - count)[len(ranks) - count:]
+    wanted = set(best.tolist())
+    names = dict()
+    with open(output + ".pages", encoding="utf-8",
+              errors="surrogateescape") as f:
+        for i, line in enumerate(f):
+            if i in wanted:
+                names[i] = line.rstrip("\n")
+    return [(names[i], float(ranks[i]))
+            for i in sorted(wanted, key=lambda i: -ranks[i])]
+
+
+def main():
+    usage = ("Usage: python outofcore.py random output pages\n"
+             "       python outofcore.py sort edges output\n"
+             "       python outofcore.py rank output [float32|float64]")
+    if len(sys.argv) < 3:
+        sys.exit(usage)
+    command = sys.argv[1]
+
+    if command == "random" and len(sys.argv) == 4:
+        write_random_links(sys.argv[2], int(sys.argv[3]), seed=0)
+        print(f"{sys.argv[3]} pages written to {sys.argv[2]}")
+
+    elif command == "sort" and len(sys.argv) == 4:
+        start = time.perf_counter()
+        pages, links = sort_links(sys.argv[2], sys.argv[3])
+        print(f"{pages} pages, {links} links sorted into {sys.argv[3]} in "
+              f"{time.perf_counter() - start:.3f}s")
+
+    elif command == "rank" and len(sys.argv) in (3, 4):
+        dtype = np.dtype(sys.argv[3] if len(sys.argv) > 3 else "float64")
+        if dtype not in (np.float32, np.float64):
+            sys.exit(usage)
+        trace = []
+        ranks = stream_pagerank(sys.argv[2], 0.85, dtype=dtype, trace=trace)
+        for i, step in enumerate(trace, 1):
+            read = ("unknown" if step["read"] is None
+                    else f"{step['read'] / 1e6:.1f} MB")
+            print(f"  iteration {i:>3}: residual {step['residual']:.2e}, "
+                  f"{step['seconds']:.3f}s, "
+                  f"{step['streamed'] / 1e6:.1f} MB streamed, "
+                  f"{read} read from storage")
+        peak = peak_memory()
+        print(f"{len(ranks)} pages, rank vectors of "
+              f"{2 * ranks.nbytes / 1e6:.1f} MB, peak resident memory "
+              + ("unknown" if peak is None else f"{peak / 1e6:.1f} MB"))
+        for page, rank in top_pages(sys.argv[2], ranks):
+            print(f"  {page}: {rank:.6f}")
+
+    else:
+        sys.exit(usage)
+
+
+if __name__ == "__main__":
+    main()
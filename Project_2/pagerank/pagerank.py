@@ -1,8 +1,11 @@
-import os
-import random
-import re
 import sys
 
+from cache import crawl_cached
+from graph import Graph
+from personalized import personalized_pagerank, teleport_matrix
+from sampling import walk
+from solvers import MAX_ITERATIONS, SOLVERS, TOLERANCE
+
 DAMPING = 0.85
 SAMPLES = 10000
 
@@ -27,35 +30,22 @@ def crawl(directory):
     Return a dictionary where each key is a page, and values are
     a list of all other pages in the corpus that are linked to by the page.
     """
-    pages = dict()
-
-    # Extract all links from HTML files
-    for filename in os.listdir(directory):
-        if not filename.endswith(".html"):
-            continue
-        with open(os.path.join(directory, filename)) as f:
-            contents = f.read()
-            links = re.findall(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"", contents)
-            pages[filename] = set(links) - {filename}
-
-    # Only include links to other pages in the corpus
-    for filename in pages:
-        pages[filename] = set(
-            link for link in pages[filename]
-            if link in pages
-        )
+    # Reuses the links cached in the directory for pages that have not
+    # changed since the last crawl, and scans only the rest
+    graph, _ = crawl_cached(directory)
+    return graph.to_corpus()
 
-    return pages
 
-
-def transition_model(corpus, page, damping_factor):
+def transition_model(corpus, page, damping_factor, teleport=None):
     """
     Return a probability distribution over which page to visit next,
     given a current page.
 
     With probability `damping_factor`, choose a link at random
     linked to by `page`. With probability `1 - damping_factor`, choose
-    a link at random chosen from all pages in the corpus.
+    a link at random chosen from all pages in the corpus, or from the
+    distribution `teleport` over pages if given. A page with no links
+    always jumps by `teleport`, so that the result sums to 1.
     """
 
     # Gets a list of pages linked to the page in question and a list of all pages within the corpus
@@ -71,6 +61,18 @@ def transition_model(corpus, page, damping_factor):
     # Creates probability distribution. Initially only includes the probability from selecting all pages randomly, not directly from linked pages
     probability_distribution = {page: all_probability for page in all_pages_list}
 
+    # Jumps to pages in proportion to the teleport distribution instead, for personalized PageRank
+    if teleport is not None:
+        teleport_total = sum(teleport.get(page, 0) for page in all_pages_list)
+        if teleport_total <= 0:
+            raise ValueError("Teleport distribution has no weight")
+        jump_distribution = {page: teleport.get(page, 0)/teleport_total for page in all_pages_list}
+
+        # A page with no links always jumps by the teleport distribution, as in personalized.personalized_pagerank
+        if len(linked_pages_list) == 0:
+            return jump_distribution
+        probability_distribution = {page: (1-damping_factor)*jump_distribution[page] for page in all_pages_list}
+
     # For each page linked to the original page, adds the linked_probability to the probability distribution
     for linked_page in linked_pages_list:
         probability_distribution[linked_page] += linked_probability
@@ -89,92 +91,57 @@ def sample_pagerank(corpus, damping_factor, n):
     PageRank values should sum to 1.
     """
     
-    # Dictionary that keeps track of how many times each page has been sampled
-    counts = {page:0 for page in corpus.keys()}
-
-    # Randomly selects a page to sample
-    page = random.choice(list(corpus.keys()))
-    counts[page] += 1
-
-    # Samples pages n-1 times (because the first random sample counts as an iteration)
-    for i in range(0, n-1):
-        # Gets transition distribution
-        transition_distribution = transition_model(corpus=corpus, page=page, damping_factor=damping_factor)
-        
-        # Uses the random.choices module to select a page given the probability distribution
-        page = random.choices(population=list(transition_distribution.keys()),
-                                weights=transition_distribution.values(),
-                                k=1,)[0]
-        
-        # Increases count for specified page
-        counts[page] += 1
-
-    # Creates the pagerank dictionary based on the counts
-    pageranks = {page:counts[page]/n for page in counts.keys()} 
+    # Walks the link graph in constant time per sample, instead of building
+    # the transition model's distribution over every page at each step
+    graph = Graph.from_corpus(corpus)
+    counts = walk(graph, damping_factor, n)
+    return graph.rank_dict(counts / n)
 
-    # Returns 
-    return pageranks
 
-
-
-def iterate_pagerank(corpus, damping_factor):
+def iterate_pagerank(corpus, damping_factor, solver="jacobi",
+                     tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS,
+                     trace=None):
     """
     Return PageRank values for each page by iteratively updating
     PageRank values until convergence.
 
+    `solver` names one of the solvers in solvers.SOLVERS. Iteration stops
+    once the solver's residual is below `tolerance`, or after
+    `max_iterations`; if `trace` is a list, each iteration's residual is
+    appended to it.
+
     Return a dictionary where keys are page names, and values are
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
     """
 
-    change_threshold = 0.001
-    N = len(corpus)
+    # Builds the link graph once as sparse arrays, so that every iteration
+    # takes time proportional to the number of links rather than N^2
+    if solver not in SOLVERS:
+        raise ValueError(f"Unknown solver: {solver}")
+    graph = Graph.from_corpus(corpus)
+    ranks = SOLVERS[solver](graph, damping_factor, tolerance=tolerance,
+                            max_iterations=max_iterations, trace=trace)
+    return graph.rank_dict(ranks)
 
-    # Creates starting pageranks
-    pageranks = {page:1/N for page in corpus.keys()}
-    
-    # Iterates until no pagerank value changes by more than 0.001
-    while True:
-        
-        threshold_broken = False
-
-        # Repeats the pagerank formula for every page
-        for p in corpus:
-
-            # Calculates the summation portion of the equation
-            summation = 0
-            for i in corpus.keys():
-                # Gets NumLinks(i). 
-                # If i contains current page --> numlinks = number of links in i
-                # If i contains no pages --> numlinks = length of corpus
-                # If i contains pages but not the current page --> skips to the next page
-                if p in corpus[i]:
-                    numlinks = len(corpus[i])
-                elif len(corpus[i]) == 0:
-                    numlinks = len(corpus)
-                else:
-                    continue
-
-                # Gets PR(i)
-                PR_i = pageranks[i]
-
-                # adds the current value to the summation
-                summation += PR_i/numlinks
-
-            
-            # Calculates PR(p)
-            PR_p = (1-damping_factor)/N + damping_factor*summation
-
-            # Checks if the change is greater than the allowed threshold. If it is, sets "threshold_broken" to True, forcing the loop to repeat
-            if abs(PR_p - pageranks[p]) > change_threshold:
-                threshold_broken = True
-
-            # Sets the pagerank value to the calculated value
-            pageranks[p] = PR_p
-
-        # If the threshold has not been broken, returns pageranks
-        if threshold_broken == False:
-            return pageranks
+
+def seeded_pagerank(corpus, damping_factor, seed_sets):
+    """
+    Return personalized PageRank values for each of `seed_sets`, where a
+    seed set is some pages the random surfer jumps to uniformly instead
+    of to any page, or a dictionary from pages to weights.
+
+    Return a list with a dictionary for each seed set, where keys are
+    page names, and values are their PageRank value for that seed set.
+    """
+
+    # Iterates all seed sets at once, so that each pass over the links
+    # serves the whole batch
+    graph = Graph.from_corpus(corpus)
+    ranks = personalized_pagerank(graph, damping_factor,
+                                  teleport_matrix(graph, seed_sets))
+    return [graph.rank_dict(ranks[:, column])
+            for column in range(len(seed_sets))]
 
 
 if __name__ == "__main__":
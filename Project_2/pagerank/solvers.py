@@ -0,0 +1,269 @@
+import sys
+import time
+
+import numpy as np
+
+from graph import random_graph
+
+# Iteration stops once the ranks change by less than this in total
+TOLERANCE = 1e-6
+
+# Iteration stops after this many sweeps even if not converged
+MAX_ITERATIONS = 1000
+
+# Gauss-Seidel updates pages in this many consecutive blocks per sweep
+BLOCKS = 256
+
+# Aitken extrapolation is applied once every this many iterations
+EXTRAPOLATION_PERIOD = 10
+
+
+class Operator:
+    """
+    The PageRank update of a Graph, as arrays shared by every solver.
+
+    Each page passes its rank, times the damping factor, in equal parts to
+    the pages it links to. A page with no links is treated as linking to
+    every page, including itself, so its share is spread over all pages.
+    """
+
+    def __init__(self, graph, damping_factor):
+        self.n = len(graph)
+        self.damping_factor = damping_factor
+        degree = graph.out_degree
+        self.dangling = degree == 0
+        self.inverse = np.zeros(self.n)
+        self.inverse[~self.dangling] = 1 / degree[~self.dangling]
+        self.sources = graph.sources()
+        self.targets = graph.indices
+        self._incoming = None
+
+    def apply(self, ranks):
+        """
+        Returns the ranks after one update of every page at once.
+        """
+        n = self.n
+
+        # Sum what flows along every link into each page at once
+        flow = np.bincount(self.targets,
+                           weights=(ranks * self.inverse)[self.sources],
+                           minlength=n)
+        flow += ranks[self.dangling].sum() / n
+        return (1 - self.damping_factor) / n + self.damping_factor * flow
+
+    def residual(self, ranks):
+        """
+        Returns the L1 norm of how far ranks are from a fixed point.
+        """
+        return np.abs(self.apply(ranks) - ranks).sum()
+
+    def incoming(self):
+        """
+        Returns the links sorted by target, as (indptr, sources, targets)
+        with the links into page i at indptr[i]:indptr[i + 1].
+        """
+        if self._incoming is None:
+            # Sorting combined keys is much faster than a stable argsort
+            n = self.n
+            keys = np.sort(self.targets.astype(np.int64) * n + self.sources)
+            targets = keys // n
+            indptr = np.zeros(n + 1, dtype=np.int64)
+            np.cumsum(np.bincount(targets, minlength=n), out=indptr[1:])
+            self._incoming = (indptr, keys - targets * n, targets)
+        return self._incoming
+
+
+def jacobi(graph, damping_factor, tolerance=TOLERANCE,
+           max_iterations=MAX_ITERATIONS, initial=None, trace=None):
+    """
+    Returns the vector of PageRank values of a Graph by power iteration,
+    applying the PageRank formula to every page at once from the previous
+    ranks. Iteration stops when the L1 norm of the change, which is also
+    the residual, is below tolerance. Starts from uniform ranks, or from
+    the vector initial if given. If trace is a list, the residual of each
+    iteration is appended to it.
+    """
+    operator = Operator(graph, damping_factor)
+    ranks = np.full(operator.n, 1 / operator.n) if initial is None else initial
+    for _ in range(max_iterations):
+        updated = operator.apply(ranks)
+        change = np.abs(updated - ranks).sum()
+        ranks = updated
+        if trace is not None:
+            trace.append(change)
+        if change < tolerance:
+            break
+    return ranks
+
+
+# The original name of Jacobi power iteration
+power_iteration = jacobi
+
+
+def sweep(operator, ranks, blocks):
+    """
+    Updates ranks in place one block of consecutive pages at a time, each
+    block using the ranks already updated by the blocks before it, and
+    returns the largest change to any page.
+    """
+    n = operator.n
+    damping_factor = operator.damping_factor
+    indptr, sources, targets = operator.incoming()
+    dangling_sum = ranks[operator.dangling].sum()
+    largest = 0.0
+    bounds = np.linspace(0, n, min(blocks, n) + 1).astype(np.int64)
+    for start, end in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+        first, last = indptr[start], indptr[end]
+        block_sources = sources[first:last]
+        flow = np.bincount(
+            targets[first:last] - start,
+            weights=ranks[block_sources] * operator.inverse[block_sources],
+            minlength=end - start)
+        updated = ((1 - damping_factor) / n
+                   + damping_factor * (flow + dangling_sum / n))
+        change = updated - ranks[start:end]
+        dangling_sum += change[operator.dangling[start:end]].sum()
+        largest = max(largest, np.abs(change).max(initial=0.0))
+        ranks[start:end] = updated
+    return largest
+
+
+def gauss_seidel(graph, damping_factor, tolerance=TOLERANCE,
+                 max_iterations=MAX_ITERATIONS, initial=None, trace=None,
+                 blocks=BLOCKS):
+    """
+    Returns PageRank values by Gauss-Seidel sweeps, which use each page's
+    new rank as soon as it is computed, in blocks of pages so that every
+    block is updated at once. With as many blocks as pages this is the
+    original page-by-page iteration. The ranks are normalized after every
+    sweep, since the sweeps alone bring their total back to 1 only slowly.
+    Stops, like the original, once no page changes by more than tolerance
+    in a sweep, and traces that change.
+    """
+    operator = Operator(graph, damping_factor)
+    ranks = (np.full(operator.n, 1 / operator.n) if initial is None
+             else initial.copy())
+    for _ in range(max_iterations):
+        change = sweep(operator, ranks, blocks)
+        ranks /= ranks.sum()
+        if trace is not None:
+            trace.append(change)
+        if change < tolerance:
+            break
+    return ranks
+
+
+def gauss_seidel_residual(graph, damping_factor, tolerance=TOLERANCE,
+                          max_iterations=MAX_ITERATIONS, initial=None,
+                          trace=None, blocks=BLOCKS):
+    """
+    Returns PageRank values by the same sweeps as gauss_seidel, but stops
+    once the L1 residual of the normalized ranks is below tolerance, which
+    bounds the actual error rather than the last step, and traces it.
+    """
+    operator = Operator(graph, damping_factor)
+    ranks = (np.full(operator.n, 1 / operator.n) if initial is None
+             else initial.copy())
+    for _ in range(max_iterations):
+        sweep(operator, ranks, blocks)
+        ranks /= ranks.sum()
+        residual = operator.residual(ranks)
+        if trace is not None:
+            trace.append(residual)
+        if residual < tolerance:
+            break
+    return ranks
+
+
+def aitken(graph, damping_factor, tolerance=TOLERANCE,
+           max_iterations=MAX_ITERATIONS, initial=None, trace=None,
+           period=EXTRAPOLATION_PERIOD):
+    """
+    Returns PageRank values by power iteration accelerated with Aitken
+    extrapolation: every period iterations, each page's rank is moved to
+    where its last three values are heading, x2 - (x2 - x1)^2 /
+    (x2 - 2 x1 + x0), which cancels the slowest-decaying error term. Pages
+    where that is undefined or negative keep their last value.
+
+    Extrapolation only pays off when one error term dominates, as on web
+    graphs, so it is kept only if the next step changes the ranks less
+    than a plain step would have been expected to; otherwise iteration
+    goes on from before it, at the cost of one wasted step. Stops and
+    traces like jacobi.
+    """
+    operator = Operator(graph, damping_factor)
+    ranks = np.full(operator.n, 1 / operator.n) if initial is None else initial
+    previous = None
+    last_change = None
+    steps = 0
+    fallback = None
+    for _ in range(max_iterations):
+        updated = operator.apply(ranks)
+        change = np.abs(updated - ranks).sum()
+
+        if fallback is not None:
+            plain, expected = fallback
+            fallback = None
+            if change >= expected:
+                # The extrapolation did not help, so go on from before it
+                ranks, previous, steps = plain, None, 0
+                continue
+
+        if trace is not None:
+            trace.append(change)
+        if change < tolerance:
+            ranks = updated
+            break
+
+        steps += 1
+        if steps >= period and previous is not None:
+            x0, x1, x2 = previous, ranks, updated
+            second = x2 - 2 * x1 + x0
+            with np.errstate(divide="ignore", invalid="ignore"):
+                extrapolated = x2 - (x2 - x1) ** 2 / second
+            usable = (np.abs(second) > 1e-300) & (extrapolated > 0)
+            extrapolated = np.where(usable, extrapolated, x2)
+            fallback = (x2, change * change / last_change)
+            ranks = extrapolated / extrapolated.sum()
+            previous, steps = None, 0
+        else:
+            previous, ranks = ranks, updated
+        last_change = change
+    return ranks
+
+
+# Every solver by name, each taking the same arguments as jacobi
+SOLVERS = {
+    "jacobi": jacobi,
+    "gauss-seidel": gauss_seidel,
+    "gauss-seidel-residual": gauss_seidel_residual,
+    "aitken": aitken,
+}
+
+
+def main():
+    if len(sys.argv) > 4:
+        sys.exit("Usage: python solvers.py [pages] [tolerance] [trace]")
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    tolerance = float(sys.argv[2]) if len(sys.argv) > 2 else 1e-8
+    show_trace = len(sys.argv) > 3 and sys.argv[3] == "trace"
+    damping = 0.85
+
+    graph = random_graph(n, seed=0)
+    operator = Operator(graph, damping)
+    exact = jacobi(graph, damping, tolerance=1e-14)
+    print(f"{n} pages, {graph.edges} links, tolerance {tolerance:g}")
+    for name, solve in SOLVERS.items():
+        trace = []
+        start = time.perf_counter()
+        ranks = solve(graph, damping, tolerance=tolerance, trace=trace)
+        elapsed = time.perf_counter() - start
+        print(f"  {name:<22} {len(trace):>5} iterations {elapsed:8.3f}s  "
+              f"residual {operator.residual(ranks):.2e}  "
+              f"error {np.abs(ranks - exact).sum():.2e}")
+        if show_trace:
+            print("    " + " ".join(f"{value:.1e}" for value in trace))
+
+
+if __name__ == "__main__":
+    main()